@@ -13,16 +13,25 @@ app = create_app()
 @app.cli.command("init-db")
 def init_db_command():
     """Clear existing data and create new tables."""
+    from flask_migrate import stamp
     from app.models.database import init_db
+    from app.startup import clear_schema_cache
+    clear_schema_cache(app)
     init_db()
+    # Tables created from the models match the latest migration
+    stamp()
     click.echo('Initialized the database.')
 
 @app.cli.command("reset-db")
 @click.confirmation_option(prompt='Are you sure you want to reset the database?')
 def reset_db_command():
     """Reset the database (WARNING: This will delete all data!)"""
+    from flask_migrate import stamp
     from app.models.database import reset_db
+    from app.startup import clear_schema_cache
+    clear_schema_cache(app)
     reset_db()
+    stamp()
     click.echo('Reset the database.')
 
 @app.cli.command("clean-db")
@@ -32,6 +41,8 @@ def clean_db_command():
     with app.app_context():
         import sqlite3
         from flask import current_app
+        from app.startup import clear_schema_cache
+        clear_schema_cache(app)
         
         db_path = current_app.config['SQLALCHEMY_DATABASE_URI'].replace('sqlite:///', '')
         if db_path.startswith('/'):
@@ -59,6 +70,169 @@ def clean_db_command():
             if conn:
                 conn.close()
 
+@app.cli.command("seed")
+@click.option('--scale', default=1.0, show_default=True,
+              help='Multiply every default volume, e.g. 0.01 for a quick local dataset.')
+@click.option('--users', type=int, help='Number of users (default 50000).')
+@click.option('--campaigns', type=int, help='Number of campaigns (default 5000).')
+@click.option('--characters', type=int, help='Number of characters (default 200000).')
+@click.option('--items', type=int, help='Number of items (default 10000).')
+@click.option('--inventory', type=int, help='Number of inventory rows (default 2000000).')
+@click.option('--notes', type=int, help='Number of campaign notes (default 100000).')
+@click.option('--maps', type=int, help='Number of maps (default 10000).')
+@click.option('--seed', 'random_seed', default=42, show_default=True, help='Random seed.')
+@click.option('--chunk-size', default=10000, show_default=True, help='Rows per executemany batch.')
+def seed_command(scale, random_seed, chunk_size, **counts):
+    """Fill the database with synthetic data for load testing."""
+    import time
+    from app.seed import DEFAULT_VOLUMES, SEED_PASSWORD, seed_database
+    
+    volumes = {name: counts[name] if counts[name] is not None else int(default * scale)
+               for name, default in DEFAULT_VOLUMES.items()}
+    started = time.perf_counter()
+    with app.app_context():
+        seed_database(db.engine, volumes, seed=random_seed, chunk_size=chunk_size, echo=click.echo)
+    click.echo(f'Seeded the database in {time.perf_counter() - started:.2f}s. '
+               f'Users log in as seed_user_<id> with password "{SEED_PASSWORD}".')
+
+@app.cli.command("sync-replicas")
+def sync_replicas_command():
+    """Copy the primary SQLite database into local SQLite read replicas."""
+    import sqlite3
+    from sqlalchemy.engine import make_url
+    
+    primary = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    if primary.get_backend_name() != 'sqlite':
+        click.echo('The primary is not SQLite; replicas are kept in sync by the database server.')
+        return
+    
+    for key in app.config['DB_REPLICA_BINDS']:
+        replica = make_url(app.config['SQLALCHEMY_BINDS'][key]['url'])
+        if replica.get_backend_name() != 'sqlite':
+            click.echo(f'Skipping {key}: not a SQLite database.')
+            continue
+        with app.app_context():
+            db.engines[key].dispose()
+        source = sqlite3.connect(primary.database)
+        target = sqlite3.connect(replica.database)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        click.echo(f'Copied {primary.database} to {key} ({replica.database}).')
+
+@app.cli.command("export-campaign")
+@click.argument('campaign_id', type=int)
+@click.option('--format', 'export_format', type=click.Choice(['ndjson', 'markdown']), default='ndjson',
+              show_default=True)
+@click.option('--output', '-o', type=click.File('w', encoding='utf-8'), default='-',
+              help='File to write (default: stdout).')
+def export_campaign_command(campaign_id, export_format, output):
+    """Stream a campaign with its players, characters, notes and maps."""
+    from app.campaign.export import export_campaign
+    
+    with app.app_context():
+        chunks = export_campaign(campaign_id, export_format)
+        if chunks is None:
+            raise click.ClickException(f'Campaign {campaign_id} does not exist.')
+        for chunk in chunks:
+            output.write(chunk)
+
+@app.cli.command("export-characters")
+@click.argument('username')
+@click.option('--format', 'export_format', type=click.Choice(['ndjson', 'csv']), default='ndjson',
+              show_default=True)
+@click.option('--output', '-o', type=click.File('w', encoding='utf-8'), default='-',
+              help='File to write (default: stdout).')
+def export_characters_command(username, export_format, output):
+    """Stream every character of a user, in a format import-characters reads."""
+    from app.character.transfer import export_characters
+    from app.models import User
+    
+    with app.app_context():
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f'User {username} does not exist.')
+        for chunk in export_characters(user.id, export_format):
+            output.write(chunk)
+
+@app.cli.command("import-characters")
+@click.argument('username')
+@click.argument('source', type=click.File('rb'))
+@click.option('--format', 'import_format', type=click.Choice(['json', 'ndjson', 'csv']),
+              help='Input format (default: csv for .csv files, otherwise JSON or NDJSON).')
+def import_characters_command(username, source, import_format):
+    """Create characters for a user from a JSON, NDJSON or CSV file."""
+    from app.character.transfer import import_characters, iter_csv, iter_json
+    from app.models import User
+    
+    import_format = import_format or ('csv' if source.name.endswith('.csv') else 'json')
+    with app.app_context():
+        user = User.query.filter_by(username=username).first()
+        if user is None:
+            raise click.ClickException(f'User {username} does not exist.')
+        rows = iter_csv(source) if import_format == 'csv' else iter_json(source)
+        result = import_characters(rows, user.id)
+        for number, errors in result.errors:
+            click.echo(f'Row {number}: ' + '; '.join(f'{field}: {", ".join(messages)}'
+                                                    for field, messages in errors.items()), err=True)
+        click.echo(f'Imported {len(result.ids)} of {result.rows} characters for {username} '
+                   f'({result.error_count} rows rejected).')
+
+@app.cli.command("archive-notes")
+@click.argument('campaign_ids', type=int, nargs=-1)
+@click.option('--all-finished', is_flag=True, help='Archive every completed or archived campaign.')
+@click.option('--restore', is_flag=True, help='Move archived notes back into campaign_note instead.')
+def archive_notes_command(campaign_ids, all_finished, restore):
+    """Move the notes of finished campaigns into compressed cold storage, or back."""
+    from sqlalchemy import select
+    from app.campaign.archive import ARCHIVABLE_STATUSES, archive_notes, restore_notes
+    from app.models import Campaign, CampaignNote
+    
+    with app.app_context():
+        if all_finished and not restore:
+            campaign_ids = db.session.execute(
+                select(Campaign.id)
+                .where(Campaign.status.in_(ARCHIVABLE_STATUSES),
+                       select(CampaignNote.id).where(CampaignNote.campaign_id == Campaign.id).exists())
+                .order_by(Campaign.id)
+            ).scalars().all()
+        elif not campaign_ids:
+            raise click.UsageError('Give campaign ids, or --all-finished.')
+        
+        for campaign_id in campaign_ids:
+            if restore:
+                click.echo(f'Campaign {campaign_id}: restored {restore_notes(campaign_id)} notes.')
+                continue
+            try:
+                archive = archive_notes(campaign_id)
+            except ValueError as e:
+                click.echo(f'Campaign {campaign_id}: skipped, {e}.')
+                continue
+            if archive is None:
+                click.echo(f'Campaign {campaign_id}: no notes to archive.')
+            else:
+                click.echo(f'Campaign {campaign_id}: {archive.note_count} notes, {archive.raw_size} bytes '
+                           f'-> {len(archive.payload)} bytes ({archive.codec}).')
+
+@app.cli.command("startup-profile")
+def startup_profile_command():
+    """Measure cold-start import and initialization time per phase."""
+    from app.startup import profile_startup
+    report = profile_startup(app)
+    
+    click.echo('Imports (self ms per top-level package):')
+    imports = sorted(report['imports'].items(), key=lambda item: item[1], reverse=True)
+    for package, ms in imports[:15]:
+        click.echo(f'  {package:<30} {ms:>9.1f}')
+    click.echo(f'  {"import app (total)":<30} {report["import_ms"]:>9.1f}')
+    
+    click.echo('create_app() phases (ms):')
+    for phase, ms in report['phases'].items():
+        click.echo(f'  {phase:<30} {ms:>9.1f}')
+    click.echo(f'  {"create_app (total)":<30} {sum(report["phases"].values()):>9.1f}')
+
 if __name__ == '__main__':
     # Configure logging
     logging.basicConfig(
@@ -74,4 +248,5 @@ if __name__ == '__main__':
     )
     
     app.logger.info('D&D App startup')
-    app.run(debug=True)
+    # Development server only; production runs wsgi:app under gunicorn
+    app.run(debug=os.environ.get('FLASK_DEBUG', '1').lower() in ('1', 'true', 'yes'))
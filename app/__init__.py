@@ -1,22 +1,25 @@
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager
-from flask_migrate import Migrate
 from flask_caching import Cache
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_wtf.csrf import CSRFProtect
 from dotenv import load_dotenv
 import os
+import click
+from app.replica import RoutingSession, init_replica_routing
+from app.instrumentation import init_instrumentation
 
 # Load environment variables
 load_dotenv()
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 login_manager = LoginManager()
-migrate = Migrate()
 cache = Cache()
+# Cache backends that keep their entries inside each worker process
+PER_PROCESS_CACHES = ('simple', 'SimpleCache', 'null', 'NullCache')
 csrf = CSRFProtect()
 limiter = Limiter(
     key_func=get_remote_address,
@@ -30,7 +33,33 @@ def load_user(id):
     from app.models import User
     return User.query.get(int(id))
 
+def _database_uri(app, db_url):
+    """Normalise a database URL from the environment for SQLAlchemy."""
+    if db_url.startswith('sqlite:///') and not db_url.startswith('sqlite:////'):
+        # Convert relative SQLite path to absolute path
+        db_path = db_url.replace('sqlite:///', '')
+        if not os.path.isabs(db_path):
+            db_path = os.path.join(app.instance_path, db_path)
+        os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        return f'sqlite:///{db_path}'
+    if db_url.startswith('postgres://'):
+        return db_url.replace('postgres://', 'postgresql://', 1)
+    return db_url
+
+# Blueprints registered by create_app as (import name, URL prefix),
+# imported only when the app is built
+BLUEPRINTS = (
+    ('app.auth', None),
+    ('app.main', None),
+    ('app.campaign', '/campaign'),
+    ('app.character', '/character'),
+    ('app.inventory', None),
+)
+
 def create_app():
+    from app.startup import StartupProfile
+    profile = StartupProfile()
+    
     app = Flask(__name__)
     
     # Configuration
@@ -40,56 +69,107 @@ def create_app():
     
     # Database Configuration
     db_url = os.environ.get('DATABASE_URL', 'sqlite:///instance/dnd.db')
-    if db_url.startswith('sqlite:///') and not db_url.startswith('sqlite:////'):
-        # Convert relative SQLite path to absolute path
-        db_path = db_url.replace('sqlite:///', '')
-        if not os.path.isabs(db_path):
-            db_path = os.path.join(app.instance_path, db_path)
-        os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
-    else:
-        app.config['SQLALCHEMY_DATABASE_URI'] = db_url
-        if app.config['SQLALCHEMY_DATABASE_URI'].startswith('postgres://'):
-            app.config['SQLALCHEMY_DATABASE_URI'] = app.config['SQLALCHEMY_DATABASE_URI'].replace('postgres://', 'postgresql://', 1)
+    app.config['SQLALCHEMY_DATABASE_URI'] = _database_uri(app, db_url)
     
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
     
-    # Cache configuration
-    app.config['CACHE_TYPE'] = os.environ.get('CACHE_TYPE', 'simple')
+    # Connection pool configuration (see app/pool.py for the profiles)
+    from app.pool import build_engine_options
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = build_engine_options(app.config['SQLALCHEMY_DATABASE_URI'])
+    
+    # Optional read replicas (comma-separated URLs), used for GET/HEAD requests
+    replica_urls = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    app.config['SQLALCHEMY_BINDS'] = {}
+    for index, url in enumerate(replica_urls):
+        uri = _database_uri(app, url)
+        app.config['SQLALCHEMY_BINDS'][f'replica_{index}'] = {'url': uri, **build_engine_options(uri)}
+    app.config['DB_REPLICA_BINDS'] = list(app.config['SQLALCHEMY_BINDS'])
+    # How long a client keeps reading from the primary after it wrote something
+    app.config['DB_REPLICA_STICKY_SECONDS'] = float(os.environ.get('DB_REPLICA_STICKY_SECONDS', '10'))
+    app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+    
+    # Schema management: tables come from `flask db upgrade` / `flask init-db`.
+    # DB_AUTO_CREATE restores the old create_all() on boot for throwaway databases.
+    app.config['DB_AUTO_CREATE'] = os.environ.get('DB_AUTO_CREATE', 'false').lower() in ('1', 'true', 'yes')
+    app.config['SCHEMA_CHECK'] = os.environ.get('SCHEMA_CHECK', 'true').lower() in ('1', 'true', 'yes')
+    
+    # Per-request SQL instrumentation (see app/instrumentation.py)
+    app.config['SQL_INSTRUMENTATION'] = os.environ.get('SQL_INSTRUMENTATION', 'true').lower() in ('1', 'true', 'yes')
+    app.config['SERVER_TIMING'] = os.environ.get('SERVER_TIMING', 'true').lower() in ('1', 'true', 'yes')
+    app.config['SQL_N_PLUS_ONE_THRESHOLD'] = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD', '5'))
+    app.config['SQL_QUERY_COUNT_THRESHOLD'] = int(os.environ.get('SQL_QUERY_COUNT_THRESHOLD', '20'))
+    app.config['SQL_TIME_THRESHOLD_MS'] = float(os.environ.get('SQL_TIME_THRESHOLD_MS', '200'))
+    
+    # Rate limiting (disable for load tests and benchmarks)
+    app.config['RATELIMIT_ENABLED'] = os.environ.get('RATELIMIT_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+    
+    # Pages rendered by app.warmup before a worker accepts traffic
+    app.config['WARMUP_PATHS'] = [path for path in os.environ.get('WARMUP_PATHS', '/login').split(',') if path]
+    
+    # Cache configuration: Redis whenever it is available, so invalidations
+    # reach every worker
+    app.config['CACHE_TYPE'] = os.environ.get('CACHE_TYPE', 'RedisCache' if os.environ.get('REDIS_URL') else 'SimpleCache')
     app.config['CACHE_DEFAULT_TIMEOUT'] = int(os.environ.get('CACHE_TIMEOUT', '300'))
+    if os.environ.get('REDIS_URL'):
+        app.config['CACHE_REDIS_URL'] = os.environ['REDIS_URL']
+    # Generation-keyed caches (pages, campaign lists, session feeds) are only
+    # correct when every process sees the same generation tokens: a shared
+    # backend, or a per-process one with a single process (CACHE_SINGLE_PROCESS)
+    app.config['CACHE_SHARED'] = (
+        app.config['CACHE_TYPE'] not in PER_PROCESS_CACHES
+        or os.environ.get('CACHE_SINGLE_PROCESS', 'false').lower() in ('1', 'true', 'yes')
+    )
+    
+    profile.mark('config')
     
     # Initialize extensions with app
     db.init_app(app)
     login_manager.init_app(app)
-    migrate.init_app(app, db)
     cache.init_app(app)
     csrf.init_app(app)
     limiter.init_app(app)
+    init_replica_routing(app)
+    init_instrumentation(app)
     
     login_manager.login_view = 'auth.login'
     
+    @app.template_filter('datetime')
+    def format_datetime(value, fmt='%Y-%m-%d %H:%M'):
+        return value.strftime(fmt) if value else ''
+    
+    # Flask-Migrate pulls in Alembic, which is only needed by the `flask db`
+    # commands, so workers started outside the flask CLI skip it.
+    in_cli = click.get_current_context(silent=True) is not None
+    if in_cli:
+        from flask_migrate import Migrate
+        Migrate(app, db)
+    profile.mark('extensions')
+    
     # Ensure instance folder exists
     os.makedirs(app.instance_path, exist_ok=True)
     
-    # Initialize database tables within app context
     with app.app_context():
-        from app.models.database import init_db
-        init_db()
+        if app.config['DB_AUTO_CREATE']:
+            from app.models.database import init_db
+            init_db()
+        
+        # CLI commands may be about to change the schema themselves, so only
+        # servers verify it against the migrations head. Auto-created
+        # databases are never stamped, so there is nothing to compare.
+        if app.config['SCHEMA_CHECK'] and not in_cli and not app.config['DB_AUTO_CREATE']:
+            from app.startup import check_schema
+            check_schema(app, db.engine)
+        
+        # Forked workers must not share the parent's pooled connections
+        from app.pool import register_engines
+        register_engines(db.engines.values())
+    profile.mark('database')
     
     # Register blueprints
-    from app.auth import bp as auth_bp
-    app.register_blueprint(auth_bp)
-    
-    from app.main import bp as main_bp
-    app.register_blueprint(main_bp)
-    
-    from app.campaign import bp as campaign_bp
-    app.register_blueprint(campaign_bp)
-    
-    from app.character import bp as character_bp
-    app.register_blueprint(character_bp)
-    
-    from app.inventory import bp as inventory_bp
-    app.register_blueprint(inventory_bp)
+    from importlib import import_module
+    for import_name, url_prefix in BLUEPRINTS:
+        app.register_blueprint(import_module(import_name).bp, url_prefix=url_prefix)
+        profile.mark(f'blueprint:{import_name}')
     
+    app.extensions['startup_profile'] = profile
     return app
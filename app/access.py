@@ -0,0 +1,109 @@
+from flask import g, has_request_context
+from flask_login import current_user
+from sqlalchemy import exists, select, union
+
+from app import cache, db
+from app.caching import generations_shared, get_generations
+from app.models import Campaign, campaign_members
+
+# Campaign ids a user owns or belongs to, stored under the user's generation
+# token: membership changes bump the token, so the set never goes stale.
+ACCESS_KEY = 'access:campaigns:{user_id}:{token}'
+ACCESS_TIMEOUT = 3600
+
+
+def _user_id(user_id):
+    if user_id is not None:
+        return user_id
+    return current_user.id if current_user.is_authenticated else None
+
+
+def _memo(name):
+    """Per-request memo dict, or a throwaway one outside requests."""
+    if not has_request_context():
+        return {}
+    if name not in g:
+        setattr(g, name, {})
+    return getattr(g, name)
+
+
+def _load_campaign_ids(user_id):
+    owned = select(Campaign.id).where(Campaign.owner_id == user_id)
+    joined = select(campaign_members.c.campaign_id).where(campaign_members.c.user_id == user_id)
+    return frozenset(db.session.execute(union(owned, joined)).scalars())
+
+
+def accessible_campaign_ids(user_id=None):
+    """Ids of every campaign the user owns or is a member of.
+
+    For listing campaigns only; access checks must use ``campaign_role``,
+    which always asks the database.
+    """
+    user_id = _user_id(user_id)
+    if user_id is None:
+        return frozenset()
+    memo = _memo('_access_campaign_ids')
+    if user_id not in memo and not generations_shared():
+        memo[user_id] = _load_campaign_ids(user_id)
+    if user_id not in memo:
+        token, = get_generations([('user', user_id)])
+        key = ACCESS_KEY.format(user_id=user_id, token=token)
+        campaign_ids = cache.get(key)
+        if campaign_ids is None:
+            campaign_ids = _load_campaign_ids(user_id)
+            cache.set(key, campaign_ids, timeout=ACCESS_TIMEOUT)
+        memo[user_id] = campaign_ids
+    return memo[user_id]
+
+
+def campaign_role(campaign_id, user_id=None):
+    """Return 'owner', 'member' or None for the user in a campaign.
+
+    Answered by a single query on the campaign primary key and the
+    membership primary key, and remembered for the rest of the request.
+    Every access check goes through here, so a removed player loses access
+    on their next request whichever worker serves it.
+    """
+    user_id = _user_id(user_id)
+    if user_id is None:
+        return None
+    memo = _memo('_access_campaign_roles')
+    if (campaign_id, user_id) not in memo:
+        is_member = exists().where(
+            campaign_members.c.campaign_id == campaign_id,
+            campaign_members.c.user_id == user_id,
+        )
+        row = db.session.execute(
+            select(Campaign.owner_id == user_id, is_member).where(Campaign.id == campaign_id)
+        ).first()
+        if row is None:
+            role = None
+        elif row[0]:
+            role = 'owner'
+        else:
+            role = 'member' if row[1] else None
+        memo[(campaign_id, user_id)] = role
+    return memo[(campaign_id, user_id)]
+
+
+def is_owner(campaign_id, user_id=None):
+    return campaign_role(campaign_id, user_id) == 'owner'
+
+
+def is_member(campaign_id, user_id=None):
+    """True for players and for the owner."""
+    return campaign_role(campaign_id, user_id) is not None
+
+
+def can_view_campaign(campaign_id, user_id=None):
+    return campaign_role(campaign_id, user_id) is not None
+
+
+def can_view_character(character, user_id=None):
+    """Owners see their characters; campaign members see each other's."""
+    user_id = _user_id(user_id)
+    if user_id is None:
+        return False
+    if character.user_id == user_id:
+        return True
+    return character.campaign_id is not None and can_view_campaign(character.campaign_id, user_id)
@@ -0,0 +1,178 @@
+import hashlib
+import os
+from functools import wraps
+
+from flask import current_app, has_app_context, request, session
+from markupsafe import Markup
+from flask_login import current_user
+from sqlalchemy import event, select
+from sqlalchemy.orm import attributes
+
+from app import cache
+from app.replica import RoutingSession
+
+# Cache keys of the per-entity generation tokens; a new token makes every
+# cached page that depended on the entity unreachable.
+GENERATION_KEY = 'gen:{kind}:{id}'
+PENDING_KEY = '_cache_generation_bumps'
+FRAGMENT_TIMEOUT = 24 * 3600
+
+
+def _new_token():
+    return os.urandom(6).hex()
+
+
+def generations_shared():
+    """Whether generation tokens are seen by every process (see CACHE_SHARED).
+
+    With a per-process backend a bump only reaches the worker that made it,
+    so caches keyed by generation would serve other workers stale data.
+    """
+    return has_app_context() and current_app.config.get('CACHE_SHARED', False)
+
+
+def get_generations(entities):
+    """Return the current generation token of each ``(kind, id)`` pair.
+
+    Without a shared backend every call gets fresh tokens, so nothing keyed
+    by them is ever reused.
+    """
+    if not generations_shared():
+        return [_new_token() for _ in entities]
+    keys = [GENERATION_KEY.format(kind=kind, id=id) for kind, id in entities]
+    tokens = list(cache.get_many(*keys)) if keys else []
+    missing = {}
+    for index, token in enumerate(tokens):
+        if token is None:
+            # An evicted counter must not fall back to a value that cached
+            # pages were already stored under, so start from a fresh token
+            tokens[index] = missing[keys[index]] = _new_token()
+    if missing:
+        cache.set_many(missing, timeout=0)
+    return tokens
+
+
+def bump(entities):
+    """Invalidate every cached page that depends on the given entities."""
+    if entities:
+        cache.set_many({GENERATION_KEY.format(kind=kind, id=id): _new_token()
+                        for kind, id in entities}, timeout=0)
+
+
+def cached_fragments(fragments, timeout=FRAGMENT_TIMEOUT):
+    """Rendered template fragments, fetched from the cache in one round trip.
+
+    ``fragments`` maps cache keys to functions rendering the fragment on a
+    miss. Keys must carry the version of what the fragment shows, such as
+    a row's updated_at: an edit then moves the fragment to a new key and
+    the stale copy just expires. Returns Markup in the order given.
+    """
+    keys = list(fragments)
+    values = list(cache.get_many(*keys))
+    missing = {}
+    for index, value in enumerate(values):
+        if value is None:
+            values[index] = missing[keys[index]] = fragments[keys[index]]()
+    if missing:
+        cache.set_many(missing, timeout=timeout)
+    return [Markup(value) for value in values]
+
+
+def invalidate_on_commit(db_session, *entities):
+    """Bump generations once the current transaction commits.
+
+    For writes that bypass the ORM flush, such as Core inserts into
+    association tables.
+    """
+    db_session.info.setdefault(PENDING_KEY, set()).update(entities)
+
+
+def _member_ids(connection, campaign_id):
+    from app.models import campaign_members
+    return connection.execute(
+        select(campaign_members.c.user_id).where(campaign_members.c.campaign_id == campaign_id)
+    ).scalars().all()
+
+
+def _affected_entities(db_session, obj):
+    from app.models import User, Campaign, CampaignRace, CampaignEdge, Character, CharacterInventory, CampaignNote, Map
+
+    if isinstance(obj, User):
+        return {('user', obj.id)}
+    if isinstance(obj, Campaign):
+        entities = {('campaign', obj.id), ('user', obj.owner_id), ('global', 0)}
+        history = attributes.get_history(obj, 'members')
+        entities.update(('user', user.id) for user in history.added + history.deleted)
+        if obj.id is not None and not (history.added or history.deleted):
+            # Campaign details appear on every member's pages
+            entities.update(('user', user_id) for user_id in _member_ids(db_session.connection(), obj.id))
+        return entities
+    if isinstance(obj, Character):
+        entities = {('character', obj.id), ('user', obj.user_id), ('global', 0)}
+        campaign_ids = attributes.get_history(obj, 'campaign_id').sum()
+        entities.update(('campaign', campaign_id) for campaign_id in campaign_ids if campaign_id)
+        return entities
+    if isinstance(obj, CharacterInventory):
+        return {('character', obj.character_id)}
+    if isinstance(obj, (CampaignNote, Map)):
+        return {('campaign', obj.campaign_id)}
+    if isinstance(obj, (CampaignRace, CampaignEdge)):
+        return {('campaign', obj.campaign_id), ('global', 0)}
+    return set()
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _collect_generation_bumps(db_session, flush_context):
+    pending = db_session.info.setdefault(PENDING_KEY, set())
+    for obj in db_session.new | db_session.deleted:
+        pending.update(_affected_entities(db_session, obj))
+    for obj in db_session.dirty:
+        if db_session.is_modified(obj):
+            pending.update(_affected_entities(db_session, obj))
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _bump_committed_generations(db_session):
+    pending = db_session.info.pop(PENDING_KEY, None)
+    if pending and has_app_context():
+        bump(pending)
+
+
+@event.listens_for(RoutingSession, 'after_rollback')
+def _discard_generation_bumps(db_session):
+    db_session.info.pop(PENDING_KEY, None)
+
+
+def cached_view(timeout=None, depends=None):
+    """Cache a GET view's rendered page per user and per entity generation.
+
+    ``depends`` receives the view's keyword arguments and returns the
+    ``(kind, id)`` pairs the page is built from, e.g. ``('character', 3)``.
+    The logged-in user is always included, so committing a change to any of
+    them invalidates the page immediately and ``timeout`` can be generous.
+    Only rendered HTML is cached; redirects and other responses pass through.
+    Pages are not cached at all unless the cache backend is shared.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # Pages carrying flashed messages are rendered once, for this request only
+            if request.method != 'GET' or session.get('_flashes') or not generations_shared():
+                return f(*args, **kwargs)
+
+            user_id = current_user.get_id() if current_user.is_authenticated else None
+            entities = [('user', user_id)] if user_id else []
+            if depends is not None:
+                entities.extend(depends(**kwargs))
+            tokens = get_generations(entities)
+
+            digest = hashlib.sha1(f'{request.full_path}|{user_id}|{",".join(tokens)}'.encode())
+            key = f'view:{request.endpoint}:{digest.hexdigest()}'
+            rv = cache.get(key)
+            if rv is None:
+                rv = f(*args, **kwargs)
+                if isinstance(rv, str):
+                    cache.set(key, rv, timeout=timeout)
+            return rv
+        return decorated_function
+    return decorator
@@ -0,0 +1,148 @@
+from collections import deque, namedtuple
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import delete, insert, select
+
+from app import cache, db
+from app.caching import invalidate_on_commit
+from app.models import Campaign, CampaignNote, CampaignNoteArchive, User
+from app.models.note import ARCHIVED_NOTE_FIELDS, iter_notes
+
+# Campaigns whose notes may be moved to cold storage
+ARCHIVABLE_STATUSES = ('completed', 'archived')
+# Newest archived notes kept decoded in the cache for the campaign page.
+# Storing an archive changes archived_at, so a stale head is never read.
+ARCHIVE_HEAD_SIZE = 20
+ARCHIVE_HEAD_KEY = 'archive:{campaign_id}:head:{archived_at}'
+
+
+class ArchivedNote(namedtuple('ArchivedNote', 'id campaign_id title content note_type created_at created_by author')):
+    """Read-only stand-in for a CampaignNote that lives in the archive."""
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'campaign_id': self.campaign_id,
+            'title': self.title,
+            'content': self.content,
+            'note_type': self.note_type,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'author': self.author.username if self.author else None,
+            'archived': True,
+        }
+
+
+def _note_columns():
+    return [getattr(CampaignNote, field) for field in ARCHIVED_NOTE_FIELDS]
+
+
+def archive_notes(campaign_id):
+    """Move a finished campaign's notes into its compressed archive and commit.
+
+    Notes added since an earlier archive are merged into it. The notes
+    leave campaign_note in one DELETE, which also drops them from the
+    search index. Returns the archive, or None if there was nothing to
+    move. Raises ValueError for campaigns that are not finished.
+    """
+    status = db.session.execute(select(Campaign.status).where(Campaign.id == campaign_id)).scalar()
+    if status not in ARCHIVABLE_STATUSES:
+        raise ValueError('Only completed or archived campaigns can have their notes archived')
+
+    rows = db.session.execute(
+        select(*_note_columns())
+        .where(CampaignNote.campaign_id == campaign_id)
+        .order_by(CampaignNote.created_at, CampaignNote.id)
+    ).all()
+    if not rows:
+        return None
+
+    archive = db.session.get(CampaignNoteArchive, campaign_id)
+    notes = [dict(row._mapping) for row in rows]
+    if archive is None:
+        archive = CampaignNoteArchive(campaign_id=campaign_id)
+        db.session.add(archive)
+    else:
+        notes = sorted(archive.notes + notes, key=lambda note: (note['created_at'] or datetime.min, note['id']))
+    archive.store(notes)
+    db.session.execute(delete(CampaignNote).where(CampaignNote.campaign_id == campaign_id))
+    invalidate_on_commit(db.session, ('campaign', campaign_id))
+    db.session.commit()
+    return archive
+
+
+def restore_notes(campaign_id):
+    """Move an archive's notes back into campaign_note and commit; return how many.
+
+    Notes keep their ids unless a newer note has taken one since, in which
+    case they get a fresh id.
+    """
+    archive = db.session.get(CampaignNoteArchive, campaign_id)
+    if archive is None:
+        return 0
+
+    notes = [{**note, 'campaign_id': campaign_id} for note in archive.notes]
+    taken = set(db.session.execute(
+        select(CampaignNote.id).where(CampaignNote.id.in_([note['id'] for note in notes]))
+    ).scalars())
+    keep_id = [note for note in notes if note['id'] not in taken]
+    new_id = [{key: value for key, value in note.items() if key != 'id'} for note in notes if note['id'] in taken]
+    for batch in (keep_id, new_id):
+        if batch:
+            db.session.execute(insert(CampaignNote), batch)
+    db.session.delete(archive)
+    invalidate_on_commit(db.session, ('campaign', campaign_id))
+    db.session.commit()
+    return len(notes)
+
+
+def _archived_head(archive):
+    """The archive's newest ARCHIVE_HEAD_SIZE notes, newest first, decoded once per archive."""
+    key = ARCHIVE_HEAD_KEY.format(campaign_id=archive.campaign_id, archived_at=archive.archived_at.isoformat())
+    notes = cache.get(key)
+    if notes is None:
+        notes = list(deque(iter_notes(archive.codec, archive.payload), maxlen=ARCHIVE_HEAD_SIZE))[::-1]
+        cache.set(key, notes)
+    return notes
+
+
+def load_archived_notes(campaign_id, limit=ARCHIVE_HEAD_SIZE):
+    """The campaign's newest archived notes with their authors, or [] if there is no archive.
+
+    Up to ARCHIVE_HEAD_SIZE notes come from the cached head of the
+    archive; a larger ``limit``, or None for all of them, decompresses it.
+    """
+    archive = db.session.get(CampaignNoteArchive, campaign_id)
+    if archive is None:
+        return []
+    if limit is not None and limit <= ARCHIVE_HEAD_SIZE:
+        notes = _archived_head(archive)[:limit]
+    else:
+        notes = archive.notes[::-1][:limit]
+    author_ids = {note['created_by'] for note in notes}
+    authors = {user.id: user for user in db.session.execute(
+        select(User).where(User.id.in_(author_ids))).scalars()} if author_ids else {}
+    return [ArchivedNote(note['id'], campaign_id, note['title'], note['content'], note['note_type'],
+                         note['created_at'], note['created_by'], authors.get(note['created_by']))
+            for note in notes]
+
+
+def iter_archived_notes(campaign_id, batch_size=1000):
+    """The campaign's archived notes as dicts, oldest first, with an ``author`` username.
+
+    Notes are decompressed as they are read and their authors looked up
+    ``batch_size`` notes at a time, so the archive is never held decoded.
+    """
+    archive = db.session.get(CampaignNoteArchive, campaign_id)
+    if archive is None:
+        return
+    notes = iter_notes(archive.codec, archive.payload)
+    usernames = {}
+    while batch := list(islice(notes, batch_size)):
+        missing = {note['created_by'] for note in batch} - usernames.keys()
+        if missing:
+            usernames.update(db.session.execute(select(User.id, User.username).where(User.id.in_(missing))).all())
+        for note in batch:
+            yield {'id': note['id'], 'title': note['title'], 'note_type': note['note_type'],
+                   'content': note['content'], 'created_at': note['created_at'],
+                   'created_by': note['created_by'], 'author': usernames.get(note['created_by'])}
@@ -0,0 +1,138 @@
+import json
+from datetime import datetime
+
+from sqlalchemy import select
+
+from app import db
+from app.campaign.archive import iter_archived_notes
+from app.models import Campaign, Character, CampaignNote, Map, User, campaign_members
+from app.models.character import ATTRIBUTES, die_label
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'markdown': ('text/markdown', 'md'),
+}
+EXPORT_CHUNK_SIZE = 1000
+# Bytes collected before a chunk is written out, so the response is not
+# sent as one tiny chunk per row
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+CHARACTER_COLUMNS = (Character.id, Character.name, Character.race, Character.character_concept,
+                     Character.rank, *(getattr(Character, f'{name}_value').label(name) for name in ATTRIBUTES),
+                     Character.hindrances, Character.edges,
+                     Character.equipment, Character.money, Character.background, Character.notes,
+                     Character.user_id, Character.created_at, Character.updated_at)
+NOTE_COLUMNS = (CampaignNote.id, CampaignNote.title, CampaignNote.note_type, CampaignNote.content,
+                CampaignNote.created_at, CampaignNote.created_by, User.username.label('author'))
+MAP_COLUMNS = (Map.id, Map.name, Map.map_type, Map.grid_width, Map.grid_height, Map.background_color,
+               Map.show_grid, Map.created_at, Map.created_by)
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def _stream(stmt, chunk_size):
+    """Rows of ``stmt`` as dicts, fetched ``chunk_size`` at a time."""
+    result = db.session.execute(stmt.execution_options(yield_per=chunk_size))
+    for row in result:
+        yield dict(row._mapping)
+
+
+def _sections(campaign, chunk_size):
+    """(kind, row) pairs for everything in the campaign, streamed from the database."""
+    members = (select(User.id, User.username)
+               .join(campaign_members, campaign_members.c.user_id == User.id)
+               .where(campaign_members.c.campaign_id == campaign.id)
+               .order_by(User.id))
+    characters = select(*CHARACTER_COLUMNS).where(Character.campaign_id == campaign.id).order_by(Character.id)
+    notes = (select(*NOTE_COLUMNS)
+             .outerjoin(User, User.id == CampaignNote.created_by)
+             .where(CampaignNote.campaign_id == campaign.id)
+             .order_by(CampaignNote.created_at, CampaignNote.id))
+    maps = select(*MAP_COLUMNS).where(Map.campaign_id == campaign.id).order_by(Map.id)
+
+    for kind, stmt in (('member', members), ('character', characters), ('note', notes), ('map', maps)):
+        if kind == 'note':
+            # Archived notes predate the ones still in campaign_note
+            for note in iter_archived_notes(campaign.id, chunk_size):
+                yield kind, note
+        for row in _stream(stmt, chunk_size):
+            if kind == 'character':
+                row.update((name, die_label(row[name])) for name in ATTRIBUTES)
+            yield kind, row
+
+
+def _campaign_header(campaign):
+    return {
+        **campaign.to_dict(),
+        'owner': campaign.owner.username if campaign.owner else None,
+        'house_rules': campaign.house_rules,
+        'available_races': campaign.get_available_races(),
+        'available_edges': campaign.get_available_edges(),
+        'created_at': campaign.created_at,
+        'exported_at': datetime.utcnow(),
+    }
+
+
+def iter_ndjson(campaign, chunk_size=EXPORT_CHUNK_SIZE):
+    """One JSON object per line: the campaign first, then one line per member, character, note and map."""
+    yield json.dumps({'type': 'campaign', **_campaign_header(campaign)}, default=_default) + '\n'
+    for kind, row in _sections(campaign, chunk_size):
+        yield json.dumps({'type': kind, **row}, default=_default) + '\n'
+
+
+def iter_markdown(campaign, chunk_size=EXPORT_CHUNK_SIZE):
+    """A readable Markdown document of the campaign."""
+    header = _campaign_header(campaign)
+    yield f'# {campaign.name}\n\n'
+    yield f'*{campaign.setting or "No setting"} · {campaign.power_level} · {campaign.status}*  \n'
+    yield f'Game master: {header["owner"]}\n\n{campaign.description}\n'
+    if campaign.house_rules:
+        yield f'\n## House rules\n\n{campaign.house_rules}\n'
+
+    headings = {'member': 'Players', 'character': 'Characters', 'note': 'Notes', 'map': 'Maps'}
+    current = None
+    for kind, row in _sections(campaign, chunk_size):
+        if kind != current:
+            current = kind
+            yield f'\n## {headings[kind]}\n\n'
+        if kind == 'member':
+            yield f'- {row["username"]}\n'
+        elif kind == 'character':
+            yield (f'- **{row["name"]}**, {row["race"]} {row["character_concept"]} ({row["rank"]}): '
+                   f'Agility {row["agility"]}, Smarts {row["smarts"]}, Spirit {row["spirit"]}, '
+                   f'Strength {row["strength"]}, Vigor {row["vigor"]}\n')
+        elif kind == 'note':
+            created = row['created_at'].strftime('%Y-%m-%d') if row['created_at'] else ''
+            yield f'### {row["title"]}\n\n*{row["note_type"] or "note"} · {row["author"]} · {created}*\n\n{row["content"]}\n\n'
+        else:
+            yield f'- {row["name"]} ({row["map_type"]}, {row["grid_width"]}x{row["grid_height"]})\n'
+
+
+def buffered(parts, size=EXPORT_BUFFER_SIZE):
+    """Join small strings into chunks of roughly ``size`` bytes."""
+    buffer, length = [], 0
+    for part in parts:
+        buffer.append(part)
+        length += len(part)
+        if length >= size:
+            yield ''.join(buffer)
+            buffer, length = [], 0
+    if buffer:
+        yield ''.join(buffer)
+
+
+def export_campaign(campaign_id, export_format='ndjson', chunk_size=EXPORT_CHUNK_SIZE):
+    """Return a generator of export chunks, or None if the campaign does not exist.
+
+    Rows are streamed with ``yield_per`` as plain column tuples, never as ORM
+    objects, so memory use does not grow with the size of the campaign.
+    """
+    campaign = db.session.get(Campaign, campaign_id)
+    if campaign is None:
+        return None
+    render = iter_markdown if export_format == 'markdown' else iter_ndjson
+    return buffered(render(campaign, chunk_size))
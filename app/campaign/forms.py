@@ -28,7 +28,8 @@ class CampaignForm(FlaskForm):
         NumberRange(min=1, max=10, message='Number of players must be between 1 and 10')
     ], default=6)
     house_rules = TextAreaField('House Rules', validators=[Optional()])
-    next_session = DateTimeField('Next Session', format='%Y-%m-%d %H:%M',
+    # The second format is what <input type="datetime-local"> submits
+    next_session = DateTimeField('Next Session', format=['%Y-%m-%d %H:%M', '%Y-%m-%dT%H:%M'],
                                validators=[Optional()], default=datetime.now)
     submit = SubmitField('Save Campaign')
 
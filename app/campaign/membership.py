@@ -0,0 +1,149 @@
+from sqlalchemy import delete, insert, or_, select
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.caching import invalidate_on_commit
+from app.models import Campaign, User, campaign_members, CAMPAIGN_FULL
+
+JOINED = 'joined'
+ALREADY_MEMBER = 'already_member'
+FULL = 'full'
+REMOVED = 'removed'
+NOT_MEMBER = 'not_member'
+NOT_FOUND = 'not_found'
+OWNER = 'owner'
+
+MAX_BULK_MEMBERS = 100
+# A concurrent join can take a seat between reading the free seats and the
+# insert; the insert then aborts and is retried against the new count
+BULK_ATTEMPTS = 3
+
+
+def add_member(campaign_id, user_id):
+    """Add a user to a campaign and commit; return JOINED, ALREADY_MEMBER or FULL.
+
+    The membership insert is the whole operation: the seat trigger on
+    campaign_members bumps member_count in the same statement and aborts it
+    when the campaign is full, and the primary key rejects duplicates, so
+    concurrent joins can neither overfill a campaign nor double-count a
+    player. The session is rolled back when the insert is refused.
+    """
+    try:
+        db.session.execute(insert(campaign_members).values(campaign_id=campaign_id, user_id=user_id))
+        invalidate_on_commit(db.session, ('campaign', campaign_id), ('user', user_id), ('global', 0))
+        db.session.commit()
+    except IntegrityError as e:
+        db.session.rollback()
+        return FULL if CAMPAIGN_FULL in str(e.orig) else ALREADY_MEMBER
+    return JOINED
+
+
+def resolve_users(identifiers):
+    """Map each username or email in ``identifiers`` to a user id, in one query.
+
+    Identifiers containing an @ are matched against email, the rest against
+    username; both columns are indexed. Unknown identifiers are left out.
+    """
+    if not identifiers:
+        return {}
+    emails = {identifier for identifier in identifiers if '@' in identifier}
+    usernames = set(identifiers) - emails
+    rows = db.session.execute(
+        select(User.id, User.username, User.email)
+        .where(or_(User.username.in_(usernames), User.email.in_(emails)))
+    ).all()
+    found = {}
+    for row in rows:
+        if row.username in usernames:
+            found[row.username] = row.id
+        if row.email in emails:
+            found[row.email] = row.id
+    return found
+
+
+def _members_among(campaign_id, user_ids):
+    return set(db.session.execute(
+        select(campaign_members.c.user_id)
+        .where(campaign_members.c.campaign_id == campaign_id, campaign_members.c.user_id.in_(user_ids))
+    ).scalars())
+
+
+def add_members(campaign_id, identifiers):
+    """Add many users to a campaign and commit; return {identifier: result}.
+
+    Results are JOINED, ALREADY_MEMBER, FULL or NOT_FOUND. Users are
+    resolved with one query and inserted with one multi-row statement.
+    Seats go to users in the order given: the free seats are read (and
+    locked, on Postgres) first, and only that many users are inserted, so
+    the seat triggers never refuse part of the statement. If a concurrent
+    join took a seat in between, the statement aborts as a whole and the
+    batch is retried.
+    """
+    identifiers = list(dict.fromkeys(identifiers))
+    user_ids = resolve_users(identifiers)
+    candidates = list(dict.fromkeys(user_ids[identifier] for identifier in identifiers if identifier in user_ids))
+
+    for attempt in range(BULK_ATTEMPTS):
+        existing = _members_among(campaign_id, candidates) if candidates else set()
+        seats = db.session.execute(
+            select(Campaign.max_players - Campaign.member_count)
+            .where(Campaign.id == campaign_id)
+            .with_for_update()
+        ).scalar() or 0
+        newcomers = [user_id for user_id in candidates if user_id not in existing]
+        joining = newcomers[:max(seats, 0)]
+        try:
+            if joining:
+                db.session.execute(insert(campaign_members).values(
+                    [{'campaign_id': campaign_id, 'user_id': user_id} for user_id in joining]))
+                invalidate_on_commit(db.session, ('campaign', campaign_id), ('global', 0),
+                                     *(('user', user_id) for user_id in joining))
+            db.session.commit()
+            break
+        except IntegrityError:
+            db.session.rollback()
+            if attempt == BULK_ATTEMPTS - 1:
+                raise
+
+    joined = set(joining)
+    results = {}
+    for identifier in identifiers:
+        user_id = user_ids.get(identifier)
+        if user_id is None:
+            results[identifier] = NOT_FOUND
+        elif user_id in existing:
+            results[identifier] = ALREADY_MEMBER
+        else:
+            results[identifier] = JOINED if user_id in joined else FULL
+    return results
+
+
+def remove_members(campaign_id, identifiers):
+    """Remove many users from a campaign and commit; return {identifier: result}.
+
+    Results are REMOVED, NOT_MEMBER, OWNER or NOT_FOUND; the owner is never
+    removed. One DELETE releases every seat through the seat trigger.
+    """
+    identifiers = list(dict.fromkeys(identifiers))
+    user_ids = resolve_users(identifiers)
+    owner_id = db.session.execute(select(Campaign.owner_id).where(Campaign.id == campaign_id)).scalar()
+    candidates = {user_id for user_id in user_ids.values() if user_id != owner_id}
+
+    existing = _members_among(campaign_id, candidates) if candidates else set()
+    if existing:
+        db.session.execute(delete(campaign_members).where(
+            campaign_members.c.campaign_id == campaign_id, campaign_members.c.user_id.in_(existing)))
+        invalidate_on_commit(db.session, ('campaign', campaign_id), ('global', 0),
+                             *(('user', user_id) for user_id in existing))
+    db.session.commit()
+
+    results = {}
+    for identifier in identifiers:
+        user_id = user_ids.get(identifier)
+        if user_id is None:
+            results[identifier] = NOT_FOUND
+        elif user_id == owner_id:
+            results[identifier] = OWNER
+        else:
+            results[identifier] = REMOVED if user_id in existing else NOT_MEMBER
+    return results
@@ -0,0 +1,208 @@
+import base64
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import and_, exists, func, literal, or_, select, union_all
+from sqlalchemy.orm import joinedload
+
+from app import db
+from app.campaign.archive import ARCHIVABLE_STATUSES, load_archived_notes
+from app.models.character import ATTRIBUTES, die_label
+from app.models import Campaign, CampaignRace, campaign_members, User, Character, CampaignNote, Map
+
+CampaignEntry = namedtuple('CampaignEntry', 'campaign is_member')
+CampaignPage = namedtuple('CampaignPage', 'entries next_cursor')
+CampaignBundle = namedtuple('CampaignBundle', 'campaign members characters notes maps')
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+BUNDLE_NOTE_LIMIT = 20
+
+
+def encode_cursor(campaign):
+    """Opaque cursor pointing just past ``campaign`` in (created_at, id) order."""
+    raw = f'{campaign.created_at.isoformat()}|{campaign.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (created_at, id) from a cursor, or raise ValueError."""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    created_at, campaign_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+    return datetime.fromisoformat(created_at), int(campaign_id)
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def allows_race(race):
+    """Campaigns that list ``race`` among their races, or list no races at all.
+
+    Both halves are index lookups: idx_campaign_race_race for the listed
+    campaigns, the campaign_race primary key for the unrestricted ones.
+    """
+    listed = select(CampaignRace.campaign_id).where(CampaignRace.race == race)
+    unrestricted = ~exists().where(CampaignRace.campaign_id == Campaign.id)
+    return or_(Campaign.id.in_(listed), unrestricted)
+
+
+def is_recruiting():
+    """Active campaigns with a free seat."""
+    return and_(Campaign.status == 'active', Campaign.member_count < Campaign.max_players)
+
+
+def listed_races():
+    """Every race some campaign lists, for the browser's race filter."""
+    return db.session.execute(select(CampaignRace.race).distinct().order_by(CampaignRace.race)).scalars().all()
+
+
+def browse_campaigns(user_id, status=None, name=None, race=None, recruiting=False, cursor=None,
+                     limit=DEFAULT_PAGE_SIZE):
+    """One page of campaigns, newest first, with the user's membership flags.
+
+    Pages are keyed on (created_at, id) rather than offsets, so every page
+    costs the same however deep the client has scrolled. Status is matched
+    exactly and name as a prefix, so both can use their indexes; ``race``
+    keeps campaigns that allow it and ``recruiting`` those with open seats.
+    Owner and membership flag come back in the same query.
+    """
+    is_member = exists().where(
+        campaign_members.c.campaign_id == Campaign.id,
+        campaign_members.c.user_id == user_id,
+    )
+    stmt = (
+        select(Campaign, is_member.label('is_member'))
+        .options(joinedload(Campaign.owner))
+    )
+
+    if status:
+        stmt = stmt.where(Campaign.status == status)
+    if name:
+        stmt = stmt.where(Campaign.name.like(f'{_escape_like(name)}%', escape='\\'))
+    if race:
+        stmt = stmt.where(allows_race(race))
+    if recruiting:
+        stmt = stmt.where(is_recruiting())
+    if cursor:
+        created_at, campaign_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(
+            Campaign.created_at < created_at,
+            and_(Campaign.created_at == created_at, Campaign.id < campaign_id),
+        ))
+
+    # Fetch one extra row to learn whether another page follows
+    stmt = stmt.order_by(Campaign.created_at.desc(), Campaign.id.desc()).limit(limit + 1)
+    rows = db.session.execute(stmt).all()
+
+    entries = [CampaignEntry(row.Campaign, bool(row.is_member)) for row in rows[:limit]]
+    next_cursor = encode_cursor(entries[-1].campaign) if len(rows) > limit else None
+    return CampaignPage(entries, next_cursor)
+
+
+def entry_to_dict(entry):
+    campaign = entry.campaign
+    return {
+        'id': campaign.id,
+        'name': campaign.name,
+        'description': campaign.description,
+        'setting': campaign.setting,
+        'power_level': campaign.power_level,
+        'status': campaign.status,
+        'created_at': campaign.created_at.isoformat() if campaign.created_at else None,
+        'next_session': campaign.next_session.isoformat() if campaign.next_session else None,
+        'owner_id': campaign.owner_id,
+        'owner': campaign.owner.username if campaign.owner else None,
+        'is_member': entry.is_member,
+        'member_count': campaign.member_count,
+        'max_players': campaign.max_players,
+    }
+
+
+def load_campaign_bundle(campaign_id, note_limit=BUNDLE_NOTE_LIMIT):
+    """Everything the campaign page shows, in five queries whatever its size.
+
+    Loads the campaign with its owner, then the members, characters, the
+    latest ``note_limit`` notes with their authors, and the maps, each as a
+    single query. Finished campaigns top the notes up from their archive.
+    Returns None when the campaign does not exist.
+    """
+    campaign = db.session.execute(
+        select(Campaign).options(joinedload(Campaign.owner)).where(Campaign.id == campaign_id)
+    ).scalar_one_or_none()
+    if campaign is None:
+        return None
+
+    members = db.session.execute(
+        select(User)
+        .join(campaign_members, campaign_members.c.user_id == User.id)
+        .where(campaign_members.c.campaign_id == campaign_id)
+        .order_by(User.username)
+    ).scalars().all()
+    characters = db.session.execute(
+        select(Character).where(Character.campaign_id == campaign_id).order_by(Character.name)
+    ).scalars().all()
+    notes = db.session.execute(
+        select(CampaignNote)
+        .options(joinedload(CampaignNote.author))
+        .where(CampaignNote.campaign_id == campaign_id)
+        .order_by(CampaignNote.created_at.desc(), CampaignNote.id.desc())
+        .limit(note_limit)
+    ).scalars().all()
+    if campaign.status in ARCHIVABLE_STATUSES and len(notes) < note_limit:
+        notes = [*notes, *load_archived_notes(campaign_id, note_limit - len(notes))]
+    maps = db.session.execute(
+        select(Map).where(Map.campaign_id == campaign_id).order_by(Map.name)
+    ).scalars().all()
+    return CampaignBundle(campaign, members, characters, notes, maps)
+
+
+def bundle_to_dict(bundle):
+    campaign = bundle.campaign
+    return {
+        'campaign': {
+            **campaign.to_dict(),
+            'owner': {'id': campaign.owner.id, 'username': campaign.owner.username},
+            'house_rules': campaign.house_rules,
+            'created_at': campaign.created_at.isoformat() if campaign.created_at else None,
+        },
+        'members': [{'id': user.id, 'username': user.username} for user in bundle.members],
+        'characters': [{
+            'id': character.id,
+            'name': character.name,
+            'race': character.race,
+            'rank': character.rank,
+            'user_id': character.user_id,
+        } for character in bundle.characters],
+        'notes': [note.to_dict() for note in bundle.notes],
+        'maps': [map.to_dict() for map in bundle.maps],
+    }
+
+
+def characters_meeting(campaign_id, minimums):
+    """The campaign's characters whose attributes are at least ``minimums``, e.g. {'vigor': 'd8'}.
+
+    The comparisons run in SQL on the encoded attributes. Raises
+    ValueError for unknown attributes or die types.
+    """
+    stmt = select(Character).where(Character.campaign_id == campaign_id)
+    for name, die in minimums.items():
+        if name not in ATTRIBUTES:
+            raise ValueError(f'Unknown attribute: {name}')
+        stmt = stmt.where(getattr(Character, name) >= die)
+    return db.session.execute(stmt.order_by(Character.name)).scalars().all()
+
+
+def attribute_histograms(campaign_id):
+    """{attribute: {die: count}} over the campaign's characters, counted in one query."""
+    counts = union_all(*(
+        select(literal(name).label('attribute'), getattr(Character, f'{name}_value').label('value'),
+               func.count().label('characters'))
+        .where(Character.campaign_id == campaign_id)
+        .group_by(getattr(Character, f'{name}_value'))
+        for name in ATTRIBUTES
+    ))
+    histograms = {name: {} for name in ATTRIBUTES}
+    for attribute, value, characters in db.session.execute(select(counts.subquery()).order_by('attribute', 'value')):
+        histograms[attribute][die_label(value)] = characters
+    return histograms
@@ -1,24 +1,101 @@
-from flask import render_template, redirect, url_for, flash, request, jsonify, current_app
+from flask import (render_template, redirect, url_for, flash, request, jsonify, current_app, abort,
+                   stream_with_context)
 from flask_login import login_required, current_user
-from app import db, cache
+from app import db, cache, limiter
+from app.access import is_member, is_owner, can_view_campaign
+from app.conditional import conditional, campaign_versions
 from app.campaign import bp
 from app.campaign.forms import CampaignForm, CampaignNoteForm, InviteForm
+from app.campaign.membership import (add_member, add_members, remove_members, ALREADY_MEMBER, FULL,
+                                     MAX_BULK_MEMBERS)
+from app.campaign.archive import archive_notes, restore_notes
+from app.campaign.export import export_campaign, EXPORT_FORMATS
+from app.campaign.schedule import (upcoming_sessions, session_to_dict, feed_token, feed_user_id, rotate_feed_token,
+                                   to_ical, UPCOMING_LIMIT)
+from app.campaign.search import search_notes, DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT
+from app.campaign.queries import (browse_campaigns, entry_to_dict, listed_races, load_campaign_bundle,
+                                  bundle_to_dict, characters_meeting, attribute_histograms,
+                                  DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE)
 from app.models import Campaign, CampaignNote, User, Character
+from app.models.character import ATTRIBUTES
 from app.errors.handlers import CampaignError
 from sqlalchemy.exc import IntegrityError
 from datetime import datetime
+import hashlib
+import json
+import re
+
+def _browse_page():
+    """Load the campaign page described by the request's filter and cursor arguments."""
+    filters = {
+        'status': request.args.get('status') or None,
+        'name': request.args.get('name', '').strip() or None,
+        'race': request.args.get('race') or None,
+        'recruiting': request.args.get('recruiting') == '1' or None,
+    }
+    limit = min(max(request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    try:
+        page = browse_campaigns(current_user.id, cursor=request.args.get('cursor'), limit=limit, **filters)
+    except ValueError:
+        abort(400)
+    return page, filters
 
 @bp.route('/')
 @login_required
 def index():
-    """Show all campaigns with filtering based on user's role."""
-    # Get all campaigns the user is involved with
-    campaigns = Campaign.query.all()
-    user_campaigns = [c.id for c in current_user.campaigns]
-    
-    return render_template('campaign/index.html', 
-                         campaigns=campaigns,
-                         user_campaigns=user_campaigns)
+    """Browse campaigns, newest first, one keyset page at a time."""
+    page, filters = _browse_page()
+    return render_template('campaign/index.html',
+                         campaigns=page.entries,
+                         next_cursor=page.next_cursor,
+                         filters=filters,
+                         races=listed_races(),
+                         form=CampaignForm())
+
+@bp.route('/api/campaigns')
+@login_required
+def browse():
+    """JSON variant of the campaign browser for infinite scroll."""
+    page, filters = _browse_page()
+    return jsonify({
+        'campaigns': [entry_to_dict(entry) for entry in page.entries],
+        'next_cursor': page.next_cursor,
+    })
+
+@bp.route('/api/sessions')
+@login_required
+def sessions():
+    """Upcoming sessions across all of the user's campaigns."""
+    limit = min(max(request.args.get('limit', 20, type=int), 1), UPCOMING_LIMIT)
+    return jsonify({
+        'sessions': [session_to_dict(session) for session in upcoming_sessions(current_user.id, limit)],
+        'calendar_url': url_for('campaign.sessions_calendar', token=feed_token(current_user), _external=True),
+    })
+
+@bp.route('/api/sessions/calendar-token', methods=['POST'])
+@login_required
+def rotate_calendar_token():
+    """Revoke the user's calendar feed URL and return a new one."""
+    token = rotate_feed_token(current_user)
+    return jsonify({
+        'calendar_url': url_for('campaign.sessions_calendar', token=token, _external=True),
+    })
+
+@bp.route('/sessions/<token>.ics')
+# Calendar apps poll without logging in, often from behind a shared address,
+# so each feed gets its own allowance instead of the per-address defaults
+@limiter.limit('120 per hour', key_func=lambda: request.view_args['token'])
+def sessions_calendar(token):
+    """iCalendar feed of the user's upcoming sessions, authenticated by a signed token."""
+    user_id = feed_user_id(token)
+    if user_id is None:
+        abort(404)
+
+    sessions = upcoming_sessions(user_id)
+    response = current_app.response_class(to_ical(sessions, request.host), mimetype='text/calendar')
+    response.set_etag(hashlib.sha256(repr(sessions).encode()).hexdigest())
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
 
 @bp.route('/create', methods=['POST'])
 @login_required
@@ -33,6 +110,7 @@ def create():
                 setting=form.setting.data,
                 power_level=form.power_level.data,
                 max_players=form.max_players.data,
+                next_session=form.next_session.data if form.next_session.raw_data else None,
                 owner=current_user,
                 status='active'
             )
@@ -51,40 +129,146 @@ def create():
 
 @bp.route('/<int:campaign_id>')
 @login_required
+@conditional(campaign_versions)
 def view(campaign_id):
     """View a specific campaign."""
-    campaign = Campaign.query.get_or_404(campaign_id)
-    if current_user not in campaign.members and current_user != campaign.owner:
+    if not can_view_campaign(campaign_id):
+        Campaign.query.get_or_404(campaign_id)
         flash('You do not have access to this campaign.', 'danger')
         return redirect(url_for('campaign.index'))
     
+    bundle = load_campaign_bundle(campaign_id)
+    if bundle is None:
+        abort(404)
+    
     note_form = CampaignNoteForm()
     invite_form = InviteForm()
     return render_template('campaign/details.html', 
-                         campaign=campaign,
+                         campaign=bundle.campaign,
+                         members=bundle.members,
+                         characters=bundle.characters,
+                         notes=bundle.notes,
+                         maps=bundle.maps,
+                         is_member=any(member.id == current_user.id for member in bundle.members),
+                         form=CampaignForm(obj=bundle.campaign),
                          note_form=note_form,
                          invite_form=invite_form)
 
+@bp.route('/<int:campaign_id>/bundle')
+@login_required
+@conditional(campaign_versions)
+def bundle(campaign_id):
+    """Campaign page data as JSON, with a strong ETag over the body."""
+    if not can_view_campaign(campaign_id):
+        Campaign.query.get_or_404(campaign_id)
+        return jsonify({'error': 'Access denied'}), 403
+    
+    bundle = load_campaign_bundle(campaign_id)
+    if bundle is None:
+        abort(404)
+    
+    body = json.dumps(bundle_to_dict(bundle), sort_keys=True, separators=(',', ':'))
+    response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(hashlib.sha256(body.encode()).hexdigest())
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response.make_conditional(request)
+
+@bp.route('/<int:campaign_id>/characters')
+@login_required
+@conditional(campaign_versions)
+def characters(campaign_id):
+    """The campaign's characters, filtered by minimum attributes such as ?min_vigor=d8."""
+    if not can_view_campaign(campaign_id):
+        Campaign.query.get_or_404(campaign_id)
+        return jsonify({'error': 'Access denied'}), 403
+    
+    minimums = {name: request.args[f'min_{name}'] for name in ATTRIBUTES if request.args.get(f'min_{name}')}
+    try:
+        matches = characters_meeting(campaign_id, minimums)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify({'characters': [{
+        'id': character.id,
+        'name': character.name,
+        'race': character.race,
+        'rank': character.rank,
+        'user_id': character.user_id,
+        **{name: getattr(character, name) for name in ATTRIBUTES},
+    } for character in matches]})
+
+@bp.route('/<int:campaign_id>/attributes')
+@login_required
+@conditional(campaign_versions)
+def attributes(campaign_id):
+    """How many of the campaign's characters have each die type, per attribute."""
+    if not can_view_campaign(campaign_id):
+        Campaign.query.get_or_404(campaign_id)
+        return jsonify({'error': 'Access denied'}), 403
+    return jsonify({'attributes': attribute_histograms(campaign_id)})
+
+@bp.route('/<int:campaign_id>/export')
+@login_required
+def export(campaign_id):
+    """Stream the whole campaign as NDJSON or Markdown."""
+    if not can_view_campaign(campaign_id):
+        Campaign.query.get_or_404(campaign_id)
+        return jsonify({'error': 'Access denied'}), 403
+    
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({'error': f'Unknown export format: {export_format}'}), 400
+    
+    chunks = export_campaign(campaign_id, export_format)
+    if chunks is None:
+        abort(404)
+    
+    mimetype, extension = EXPORT_FORMATS[export_format]
+    # No Content-Length: the server sends the body with chunked transfer encoding
+    response = current_app.response_class(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=campaign-{campaign_id}.{extension}'
+    return response
+
+@bp.route('/<int:campaign_id>/notes/search')
+@login_required
+@conditional(campaign_versions)
+def search_campaign_notes(campaign_id):
+    """Ranked full-text search over a campaign's notes."""
+    if not can_view_campaign(campaign_id):
+        Campaign.query.get_or_404(campaign_id)
+        return jsonify({'error': 'Access denied'}), 403
+    
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'error': 'Missing search query'}), 400
+    
+    limit = min(max(request.args.get('limit', DEFAULT_SEARCH_LIMIT, type=int), 1), MAX_SEARCH_LIMIT)
+    try:
+        page = search_notes(campaign_id, query,
+                            note_type=request.args.get('note_type') or None,
+                            cursor=request.args.get('cursor'),
+                            limit=limit)
+    except ValueError:
+        abort(400)
+    return jsonify({'results': page.results, 'next_cursor': page.next_cursor})
+
 @bp.route('/<int:campaign_id>/join', methods=['POST'])
 @login_required
 def join(campaign_id):
     """Join a campaign."""
     campaign = Campaign.query.get_or_404(campaign_id)
     
-    if current_user in campaign.members:
-        return jsonify({'success': False, 'message': 'You are already a member of this campaign'})
-    
-    if len(campaign.members) >= campaign.max_players:
-        return jsonify({'success': False, 'message': 'This campaign is full'})
-    
     try:
-        campaign.members.append(current_user)
-        db.session.commit()
-        return jsonify({'success': True, 'message': 'Successfully joined the campaign'})
+        result = add_member(campaign.id, current_user.id)
     except Exception as e:
         db.session.rollback()
         current_app.logger.error(f'Error joining campaign: {str(e)}')
         return jsonify({'success': False, 'message': 'An error occurred while joining the campaign'})
+    
+    if result == ALREADY_MEMBER:
+        return jsonify({'success': False, 'message': 'You are already a member of this campaign'})
+    if result == FULL:
+        return jsonify({'success': False, 'message': 'This campaign is full'})
+    return jsonify({'success': True, 'message': 'Successfully joined the campaign'})
 
 @bp.route('/<int:campaign_id>/leave', methods=['POST'])
 @login_required
@@ -92,10 +276,10 @@ def leave(campaign_id):
     """Leave a campaign."""
     campaign = Campaign.query.get_or_404(campaign_id)
     
-    if current_user == campaign.owner:
+    if is_owner(campaign.id):
         return jsonify({'success': False, 'message': 'The campaign owner cannot leave the campaign'})
     
-    if current_user not in campaign.members:
+    if not is_member(campaign.id):
         return jsonify({'success': False, 'message': 'You are not a member of this campaign'})
     
     try:
@@ -113,7 +297,7 @@ def edit(campaign_id):
     """Edit campaign details."""
     campaign = Campaign.query.get_or_404(campaign_id)
     
-    if current_user != campaign.owner:
+    if not is_owner(campaign.id):
         return jsonify({'success': False, 'message': 'Only the campaign owner can edit campaign details'})
     
     form = CampaignForm()
@@ -124,6 +308,9 @@ def edit(campaign_id):
             campaign.setting = form.setting.data
             campaign.power_level = form.power_level.data
             campaign.max_players = form.max_players.data
+            # Clients that leave the field out keep the current schedule
+            if form.next_session.raw_data:
+                campaign.next_session = form.next_session.data
             db.session.commit()
             return jsonify({'success': True, 'message': 'Campaign updated successfully'})
         except IntegrityError:
@@ -141,7 +328,7 @@ def invite(campaign_id):
     """Invite a player to the campaign."""
     campaign = Campaign.query.get_or_404(campaign_id)
     
-    if current_user != campaign.owner:
+    if not is_owner(campaign.id):
         return jsonify({'success': False, 'message': 'Only the campaign owner can invite players'})
     
     form = InviteForm()
@@ -151,29 +338,105 @@ def invite(campaign_id):
         if not user:
             return jsonify({'success': False, 'message': 'User not found'})
         
-        if user in campaign.members:
-            return jsonify({'success': False, 'message': 'User is already a member of this campaign'})
-        
-        if len(campaign.members) >= campaign.max_players:
-            return jsonify({'success': False, 'message': 'Campaign is full'})
-        
         try:
-            campaign.members.append(user)
-            db.session.commit()
-            return jsonify({'success': True, 'message': f'Successfully invited {user.username} to the campaign'})
+            result = add_member(campaign.id, user.id)
         except Exception as e:
             db.session.rollback()
             current_app.logger.error(f'Error inviting player: {str(e)}')
             return jsonify({'success': False, 'message': 'An error occurred while inviting the player'})
+        
+        if result == ALREADY_MEMBER:
+            return jsonify({'success': False, 'message': 'User is already a member of this campaign'})
+        if result == FULL:
+            return jsonify({'success': False, 'message': 'Campaign is full'})
+        return jsonify({'success': True, 'message': f'Successfully invited {user.username} to the campaign'})
     return jsonify({'success': False, 'message': 'Invalid form data'})
 
+def _bulk_member_request(campaign_id, update):
+    """Run a bulk membership change for the owner and report one result per user.
+
+    Accepts a JSON body ``{"users": [...]}`` or a ``users`` form field with
+    usernames or emails separated by commas or whitespace.
+    """
+    campaign = Campaign.query.get_or_404(campaign_id)
+    if not is_owner(campaign.id):
+        return jsonify({'success': False, 'message': 'Only the campaign owner can manage players'}), 403
+    
+    payload = request.get_json(silent=True)
+    if payload is not None:
+        users = payload.get('users') if isinstance(payload, dict) else None
+    else:
+        users = re.split(r'[\s,;]+', request.form.get('users', ''))
+    if not isinstance(users, list):
+        return jsonify({'success': False, 'message': 'Expected a list of usernames or emails'}), 400
+    users = [str(user).strip() for user in users if str(user).strip()]
+    if not users:
+        return jsonify({'success': False, 'message': 'No users given'}), 400
+    if len(users) > MAX_BULK_MEMBERS:
+        return jsonify({'success': False, 'message': f'At most {MAX_BULK_MEMBERS} users per request'}), 400
+    
+    try:
+        results = update(campaign.id, users)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f'Error updating members of campaign {campaign.id}: {str(e)}')
+        return jsonify({'success': False, 'message': 'An error occurred while updating the players'})
+    
+    return jsonify({
+        'success': True,
+        'results': [{'user': user, 'result': result} for user, result in results.items()],
+        'member_count': campaign.member_count,
+        'max_players': campaign.max_players,
+    })
+
+@bp.route('/<int:campaign_id>/members', methods=['POST'])
+@login_required
+def add_players(campaign_id):
+    """Invite many players at once; seats go to them in the order given."""
+    return _bulk_member_request(campaign_id, add_members)
+
+@bp.route('/<int:campaign_id>/members/remove', methods=['POST'])
+@login_required
+def remove_players(campaign_id):
+    """Remove many players at once."""
+    return _bulk_member_request(campaign_id, remove_members)
+
+@bp.route('/<int:campaign_id>/notes/archive', methods=['POST'])
+@login_required
+def archive(campaign_id):
+    """Move a finished campaign's notes into compressed cold storage."""
+    campaign = Campaign.query.get_or_404(campaign_id)
+    if not is_owner(campaign.id):
+        return jsonify({'success': False, 'message': 'Only the campaign owner can archive notes'}), 403
+    
+    try:
+        note_archive = archive_notes(campaign.id)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)})
+    if note_archive is None:
+        return jsonify({'success': False, 'message': 'There are no notes to archive'})
+    return jsonify({'success': True, 'message': f'Archived {note_archive.note_count} notes'})
+
+@bp.route('/<int:campaign_id>/notes/restore', methods=['POST'])
+@login_required
+def restore(campaign_id):
+    """Move archived notes back into the campaign."""
+    campaign = Campaign.query.get_or_404(campaign_id)
+    if not is_owner(campaign.id):
+        return jsonify({'success': False, 'message': 'Only the campaign owner can restore notes'}), 403
+    
+    restored = restore_notes(campaign.id)
+    if not restored:
+        return jsonify({'success': False, 'message': 'This campaign has no archived notes'})
+    return jsonify({'success': True, 'message': f'Restored {restored} notes'})
+
 @bp.route('/<int:campaign_id>/note', methods=['POST'])
 @login_required
 def add_note(campaign_id):
     """Add a note to the campaign."""
     campaign = Campaign.query.get_or_404(campaign_id)
     
-    if current_user not in campaign.members:
+    if not is_member(campaign.id):
         return jsonify({'success': False, 'message': 'Only campaign members can add notes'})
     
     form = CampaignNoteForm()
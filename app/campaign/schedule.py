@@ -0,0 +1,138 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+from itsdangerous import BadSignature, URLSafeSerializer
+from sqlalchemy import select
+
+from app import cache, db
+from app.caching import generations_shared, get_generations
+from app.models import Campaign, User, campaign_members
+
+# A user's upcoming sessions, stored under their generation token: editing a
+# campaign bumps the generation of every member, so a rescheduled session
+# is never served stale. Sessions that have since started are dropped on read.
+UPCOMING_KEY = 'sessions:upcoming:{user_id}:{token}'
+UPCOMING_TIMEOUT = 3600
+UPCOMING_LIMIT = 50
+
+# Sessions have no end time; calendar entries get a typical evening's length
+SESSION_LENGTH = timedelta(hours=4)
+FEED_SALT = 'campaign-session-feed'
+
+
+def _load_upcoming(user_id, now, limit):
+    rows = db.session.execute(
+        select(Campaign.id, Campaign.name, Campaign.setting, Campaign.next_session,
+               User.username.label('owner'))
+        .join(campaign_members, campaign_members.c.campaign_id == Campaign.id)
+        .join(User, User.id == Campaign.owner_id)
+        .where(campaign_members.c.user_id == user_id, Campaign.next_session >= now)
+        .order_by(Campaign.next_session, Campaign.id)
+        .limit(limit)
+    ).all()
+    return [dict(row._mapping) for row in rows]
+
+
+def upcoming_sessions(user_id, limit=UPCOMING_LIMIT):
+    """The next sessions of every campaign the user belongs to, soonest first.
+
+    One query over the user's memberships and the next_session index,
+    cached until one of their campaigns changes.
+    """
+    now = datetime.utcnow()
+    if not generations_shared():
+        return _load_upcoming(user_id, now, limit)
+    token, = get_generations([('user', user_id)])
+    key = UPCOMING_KEY.format(user_id=user_id, token=token)
+    sessions = cache.get(key)
+    if sessions is None:
+        sessions = _load_upcoming(user_id, now, UPCOMING_LIMIT)
+        cache.set(key, sessions, timeout=UPCOMING_TIMEOUT)
+    return [session for session in sessions if session['next_session'] >= now][:limit]
+
+
+def session_to_dict(session):
+    return {**session, 'next_session': session['next_session'].isoformat()}
+
+
+def _feed_serializer():
+    return URLSafeSerializer(current_app.config['SECRET_KEY'], salt=FEED_SALT)
+
+
+def feed_token(user):
+    """Signed token that lets calendar clients fetch a user's feed without logging in.
+
+    It carries the user's feed_generation, so rotate_feed_token() revokes
+    every token issued before it.
+    """
+    return _feed_serializer().dumps([user.id, user.feed_generation])
+
+
+def feed_user_id(token):
+    """Return the user id a feed token was issued for, or None if it is not valid or was revoked."""
+    try:
+        user_id, generation = _feed_serializer().loads(token)
+    except (BadSignature, TypeError, ValueError):
+        return None
+    current = db.session.execute(select(User.feed_generation).where(User.id == user_id)).scalar()
+    return user_id if current is not None and current == generation else None
+
+
+def rotate_feed_token(user):
+    """Revoke the user's feed tokens and commit; return the new token."""
+    user.feed_generation += 1
+    db.session.commit()
+    return feed_token(user)
+
+
+def _escape(text):
+    return (text or '').replace('\\', '\\\\').replace(';', '\\;').replace(',', '\\,').replace('\n', '\\n')
+
+
+def _fold(line):
+    """Split a content line into 75 octet pieces, as RFC 5545 requires."""
+    data = line.encode()
+    if len(data) <= 75:
+        return line
+    parts, start, limit = [], 0, 75
+    while start < len(data):
+        end = min(start + limit, len(data))
+        # Never split inside a UTF-8 sequence
+        while end < len(data) and (data[end] & 0xC0) == 0x80:
+            end -= 1
+        parts.append(data[start:end].decode())
+        start, limit = end, 74
+    return '\r\n '.join(parts)
+
+
+def to_ical(sessions, host):
+    """Render sessions as an iCalendar feed.
+
+    Times are written as floating local times, since next_session is stored
+    as the wall-clock time the game master entered.
+    """
+    stamp = datetime.utcnow().strftime('%Y%m%dT%H%M%SZ')
+    lines = [
+        'BEGIN:VCALENDAR',
+        'VERSION:2.0',
+        'PRODID:-//DnD Web App//Upcoming sessions//EN',
+        'CALSCALE:GREGORIAN',
+        'X-WR-CALNAME:Upcoming sessions',
+    ]
+    for session in sessions:
+        start = session['next_session']
+        description = f'Game master: {session["owner"]}'
+        if session['setting']:
+            description += f'\nSetting: {session["setting"]}'
+        lines += [
+            'BEGIN:VEVENT',
+            f'UID:campaign-{session["id"]}-{start:%Y%m%dT%H%M%S}@{host}',
+            f'DTSTAMP:{stamp}',
+            f'DTSTART:{start:%Y%m%dT%H%M%S}',
+            f'DTEND:{start + SESSION_LENGTH:%Y%m%dT%H%M%S}',
+            f'SUMMARY:{_escape(session["name"])}',
+            f'DESCRIPTION:{_escape(description)}',
+            'END:VEVENT',
+        ]
+    lines.append('END:VCALENDAR')
+    return '\r\n'.join(_fold(line) for line in lines) + '\r\n'
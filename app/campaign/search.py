@@ -0,0 +1,129 @@
+import base64
+import re
+from collections import namedtuple
+
+from markupsafe import escape
+from sqlalchemy import and_, column, func, literal_column, or_, select, table
+
+from app import db
+from app.models import CampaignNote, User
+
+SearchPage = namedtuple('SearchPage', 'results next_cursor')
+
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 50
+
+# Snippet highlight markers; the text around them is HTML-escaped before
+# they are swapped for <mark> tags
+_MARK_START, _MARK_END = '\x02', '\x03'
+_TOKEN = re.compile(r'\w+', re.UNICODE)
+
+_fts = table('campaign_note_fts', column('rowid'), column('campaign_note_fts'))
+_search_vector = literal_column('campaign_note.search_vector')
+
+
+def encode_cursor(score, note_id):
+    raw = f'{score!r}|{note_id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (score, note_id) from a cursor, or raise ValueError."""
+    padded = cursor + '=' * (-len(cursor) % 4)
+    score, note_id = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+    return float(score), int(note_id)
+
+
+def _fts5_query(text):
+    """Quote every word so user input cannot use FTS5 syntax; the last word matches as a prefix."""
+    tokens = _TOKEN.findall(text)
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"' for token in tokens) + '*'
+
+
+def _ranked(dialect, query):
+    """Return (from clause, match condition, score) where a lower score ranks higher."""
+    if dialect == 'postgresql':
+        tsquery = func.websearch_to_tsquery('english', query)
+        return (CampaignNote.__table__, _search_vector.op('@@')(tsquery),
+                -func.ts_rank_cd(_search_vector, tsquery))
+    match = _fts5_query(query)
+    if match is None:
+        return None
+    source = _fts.join(CampaignNote, CampaignNote.id == _fts.c.rowid)
+    # Title matches weigh ten times as much as content matches
+    return source, _fts.c.campaign_note_fts.match(match), func.bm25(literal_column('campaign_note_fts'), 10.0, 1.0)
+
+
+def _snippets(dialect, query, note_ids):
+    if dialect == 'postgresql':
+        options = f'StartSel={_MARK_START}, StopSel={_MARK_END}, MaxWords=30, MinWords=12, MaxFragments=2'
+        stmt = (select(CampaignNote.id, func.ts_headline('english', CampaignNote.content,
+                                                         func.websearch_to_tsquery('english', query), options))
+                .where(CampaignNote.id.in_(note_ids)))
+    else:
+        snippet = func.snippet(literal_column('campaign_note_fts'), 1, _MARK_START, _MARK_END, '…', 24)
+        stmt = (select(_fts.c.rowid, snippet)
+                .where(_fts.c.campaign_note_fts.match(_fts5_query(query)), _fts.c.rowid.in_(note_ids)))
+    return dict(db.session.execute(stmt).all())
+
+
+def _highlight(snippet):
+    return str(escape(snippet or '')).replace(_MARK_START, '<mark>').replace(_MARK_END, '</mark>')
+
+
+def search_notes(campaign_id, query, note_type=None, cursor=None, limit=DEFAULT_SEARCH_LIMIT):
+    """One page of a campaign's notes matching ``query``, best match first.
+
+    Matching and ranking run on the search index (FTS5 on SQLite, a GIN
+    indexed tsvector on Postgres), so cost follows the number of matches
+    rather than the size of the notes. Snippets are only built for the
+    page being returned, with matches wrapped in <mark> and everything else
+    HTML-escaped. Raises ValueError for a malformed cursor.
+    """
+    dialect = db.session.get_bind(mapper=CampaignNote).dialect.name
+    ranked = _ranked(dialect, query)
+    if ranked is None:
+        return SearchPage([], None)
+    source, match, score = ranked
+
+    in_campaign = CampaignNote.campaign_id == campaign_id
+    if dialect == 'sqlite':
+        # Keep SQLite from driving the join off idx_note_campaign: probing
+        # FTS5 once per note restarts the match and bm25 for every row and
+        # is an order of magnitude slower than one pass over the matches.
+        in_campaign = CampaignNote.campaign_id + 0 == campaign_id
+    matches = (
+        select(CampaignNote.id, CampaignNote.title, CampaignNote.note_type, CampaignNote.created_at,
+               CampaignNote.created_by, score.label('score'))
+        .select_from(source)
+        .where(match, in_campaign)
+    )
+    if note_type:
+        matches = matches.where(CampaignNote.note_type == note_type)
+    matches = matches.subquery()
+
+    stmt = (select(matches, User.username)
+            .outerjoin(User, User.id == matches.c.created_by)
+            .order_by(matches.c.score, matches.c.id)
+            .limit(limit + 1))
+    if cursor:
+        last_score, last_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(matches.c.score > last_score,
+                              and_(matches.c.score == last_score, matches.c.id > last_id)))
+    rows = db.session.execute(stmt).all()
+
+    page = rows[:limit]
+    snippets = _snippets(dialect, query, [row.id for row in page]) if page else {}
+    results = [{
+        'id': row.id,
+        'title': row.title,
+        'note_type': row.note_type,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+        'author': row.username,
+        'score': round(-row.score, 4),
+        'snippet': _highlight(snippets.get(row.id)),
+    } for row in page]
+    next_cursor = encode_cursor(page[-1].score, page[-1].id) if len(rows) > limit else None
+    return SearchPage(results, next_cursor)
@@ -0,0 +1,112 @@
+"""Savage Worlds trait tests: exploding dice, the Wild Die and raises.
+
+Rolls are made in batches with NumPy, so a squad of extras or a few
+thousand simulated tests cost one vectorized pass per ace. Exact odds
+for a die, modifier and target are worked out once and cached.
+"""
+from collections import namedtuple
+from fractions import Fraction
+from functools import lru_cache
+
+import numpy as np
+
+from app.models.character import die_value
+
+DIE_SIZES = (4, 6, 8, 10, 12)
+WILD_DIE = 6
+TARGET_NUMBER = 4
+RAISE = 4
+# Tables and batch summaries lump every result from this many raises up
+MAX_RAISES = 4
+# Bounds on what callers may ask for; odds() is cached per combination
+MAX_MODIFIER = 20
+MIN_TARGET, MAX_TARGET = 1, 30
+
+CRITICAL_FAILURE = -2
+FAILURE = -1
+OUTCOMES = ('critical_failure', 'failure', 'success') + tuple(
+    f'raises_{count}' for count in range(1, MAX_RAISES + 1))
+
+TraitRolls = namedtuple('TraitRolls', 'totals outcomes')
+
+
+def parse_die(die):
+    """Split a die type into its size and modifier: 'd12+1' is (12, 1), 'd4-2' is (4, -2)."""
+    value = die_value(die)
+    if value > 12:
+        return 12, value - 12
+    if value < 4:
+        return 4, value - 4
+    if value not in DIE_SIZES:
+        raise ValueError(f'Not a die type: {die!r}')
+    return value, 0
+
+
+def _at_least(size, total):
+    """Exact chance that an exploding ``size`` die totals ``total`` or more."""
+    if total <= 1:
+        return Fraction(1)
+    # Reaching the total takes ``aces`` maximum rolls and then a roll of at least ``rest``
+    aces, rest = divmod(total - 1, size)
+    return Fraction(size - rest, size) / size ** aces
+
+
+@lru_cache(maxsize=1024)
+def odds(size, modifier=0, wild_card=False, target=TARGET_NUMBER):
+    """Exact chance of each of OUTCOMES, as a tuple of floats that sums to 1.
+
+    Wild Cards roll a d6 Wild Die alongside the trait die and keep the
+    higher; when both come up 1 the test is a critical failure whatever
+    the modifier.
+    """
+    snake_eyes = Fraction(1, size * WILD_DIE) if wild_card else Fraction(0)
+
+    def succeeds(total):
+        # Chance the kept die reaches ``total`` after the modifier, snake eyes excluded
+        needed = total - modifier
+        chance = _at_least(size, needed)
+        if wild_card:
+            chance = 1 - (1 - chance) * (1 - _at_least(WILD_DIE, needed))
+        return chance - (snake_eyes if needed <= 1 else 0)
+
+    at_least = [succeeds(target + RAISE * raises) for raises in range(MAX_RAISES + 1)]
+    table = [snake_eyes, 1 - snake_eyes - at_least[0]]
+    table += [at_least[raises] - at_least[raises + 1] for raises in range(MAX_RAISES)]
+    table.append(at_least[MAX_RAISES])
+    return tuple(float(chance) for chance in table)
+
+
+def _explode(rng, size, count):
+    totals = rng.integers(1, size + 1, count)
+    aced = np.flatnonzero(totals == size)
+    while aced.size:
+        rolls = rng.integers(1, size + 1, aced.size)
+        totals[aced] += rolls
+        aced = aced[rolls == size]
+    return totals
+
+
+def roll(size, count=1, modifier=0, wild_card=False, target=TARGET_NUMBER, rng=None):
+    """Roll ``count`` independent trait tests at once.
+
+    Returns the modified totals and an outcome per test: CRITICAL_FAILURE,
+    FAILURE, or the number of raises on a success (0 for a plain success).
+    """
+    rng = rng or np.random.default_rng()
+    totals = _explode(rng, size, count)
+    if wild_card:
+        wild = _explode(rng, WILD_DIE, count)
+        # Exploding dice only total 1 when the first roll was a 1
+        snake_eyes = (totals == 1) & (wild == 1)
+        totals = np.maximum(totals, wild)
+    totals += modifier
+    outcomes = np.where(totals >= target, (totals - target) // RAISE, FAILURE)
+    if wild_card:
+        outcomes[snake_eyes] = CRITICAL_FAILURE
+    return TraitRolls(totals, outcomes)
+
+
+def summarize(outcomes):
+    """Count a batch of outcomes under the names in OUTCOMES."""
+    counts = np.bincount(np.minimum(outcomes, MAX_RAISES) - CRITICAL_FAILURE, minlength=len(OUTCOMES))
+    return dict(zip(OUTCOMES, counts.tolist()))
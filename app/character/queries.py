@@ -0,0 +1,65 @@
+from collections import namedtuple
+
+from sqlalchemy import and_, func, or_, select
+
+from app import db
+from app.campaign.queries import decode_cursor, encode_cursor
+from app.models import Campaign, Character
+
+CharacterPage = namedtuple('CharacterPage', 'entries next_cursor')
+CharacterStats = namedtuple('CharacterStats', 'total in_campaign available')
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+
+# What a character card shows; the Text fields are left to character.view
+SUMMARY_COLUMNS = (Character.id, Character.name, Character.race, Character.character_concept,
+                   Character.rank, Character.campaign_id, Campaign.name.label('campaign_name'),
+                   Character.created_at)
+
+
+def character_summaries(user_id, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """One page of the user's characters, newest first, as summary rows.
+
+    Selects only SUMMARY_COLUMNS and walks idx_character_user_id
+    (user_id, created_at, id) with a keyset cursor, so a page costs the
+    same however many characters come before it.
+    """
+    stmt = (
+        select(*SUMMARY_COLUMNS)
+        .outerjoin(Campaign, Campaign.id == Character.campaign_id)
+        .where(Character.user_id == user_id)
+    )
+    if cursor:
+        created_at, character_id = decode_cursor(cursor)
+        stmt = stmt.where(or_(
+            Character.created_at < created_at,
+            and_(Character.created_at == created_at, Character.id < character_id),
+        ))
+    rows = db.session.execute(
+        stmt.order_by(Character.created_at.desc(), Character.id.desc()).limit(limit + 1)
+    ).all()
+    entries = rows[:limit]
+    next_cursor = encode_cursor(entries[-1]) if len(rows) > limit else None
+    return CharacterPage(entries, next_cursor)
+
+
+def count_characters(user_id):
+    """How many characters the user has, and how many are in a campaign, in one query."""
+    total, in_campaign = db.session.execute(
+        select(func.count(), func.count(Character.campaign_id)).where(Character.user_id == user_id)
+    ).one()
+    return CharacterStats(total, in_campaign, total - in_campaign)
+
+
+def summary_to_dict(row):
+    return {
+        'id': row.id,
+        'name': row.name,
+        'race': row.race,
+        'character_concept': row.character_concept,
+        'rank': row.rank,
+        'campaign_id': row.campaign_id,
+        'campaign_name': row.campaign_name,
+        'created_at': row.created_at.isoformat() if row.created_at else None,
+    }
@@ -0,0 +1,126 @@
+import json
+from collections import namedtuple
+
+from sqlalchemy import func, inspect, select
+from sqlalchemy.orm import joinedload, undefer
+
+from app import db
+from app.models.character import (ATTRIBUTES, REVISION_FIELDS, SNAPSHOT_INTERVAL, CharacterRevision,
+                                  die_label)
+
+RevisionPage = namedtuple('RevisionPage', 'revisions next_before')
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def _encode(values):
+    return json.dumps(values, separators=(',', ':'), sort_keys=True)
+
+
+def _states(character):
+    """The tracked fields before and after the pending edit of ``character``."""
+    state = inspect(character)
+    columns = {field: f'{field}_value' if field in ATTRIBUTES else field for field in REVISION_FIELDS}
+    if state.persistent:
+        # Load deferred fields the edit did not touch, without flushing the ones it did
+        with db.session.no_autoflush:
+            for column in state.unloaded & set(columns.values()):
+                getattr(character, column)
+    before, after = {}, {}
+    for field, column in columns.items():
+        history = state.attrs[column].history
+        value = history.added[0] if history.added else (history.unchanged or [None])[0]
+        old = history.deleted[0] if history.deleted else value
+        if field in ATTRIBUTES:
+            value, old = die_label(value), die_label(old)
+        # Imports leave optional text fields NULL where the form submits ''
+        before[field], after[field] = (None if v == '' else v for v in (old, value))
+    return before, after
+
+
+def _snapshot_number(number):
+    return number - (number - 1) % SNAPSHOT_INTERVAL
+
+
+def latest_number(character_id):
+    return db.session.execute(
+        select(func.max(CharacterRevision.number)).where(CharacterRevision.character_id == character_id)
+    ).scalar() or 0
+
+
+def record_revision(character, user_id):
+    """Add a revision for the pending changes to ``character``; call before committing.
+
+    Stores only the changed fields, plus the full state on snapshot
+    revisions. Characters from before revisions were kept get their
+    pre-edit state recorded as revision 1 first. Returns the new revision,
+    or None when nothing tracked changed.
+    """
+    before, after = _states(character)
+    persistent, edited_at = inspect(character).persistent, character.updated_at
+    if persistent:
+        # Write the edit before reading the latest number: the UPDATE holds
+        # the character's row (all of SQLite) until commit, so concurrent
+        # edits number their revisions one after the other
+        db.session.flush()
+    number = latest_number(character.id) if character.id else 0
+    if number == 0 and persistent:
+        db.session.add(CharacterRevision(character_id=character.id, number=1, changes=_encode(before),
+                                         snapshot=_encode(before), created_at=edited_at))
+        number = 1
+    changes = after if number == 0 else {field: value for field, value in after.items() if value != before[field]}
+    if not changes:
+        return None
+    number += 1
+    revision = CharacterRevision(number=number, changes=_encode(changes), edited_by=user_id)
+    if (number - 1) % SNAPSHOT_INTERVAL == 0:
+        revision.snapshot = _encode(after)
+    character.revisions.append(revision)
+    return revision
+
+
+def character_at(character_id, number):
+    """The tracked fields as of revision ``number``, or None if there is no such revision.
+
+    Reads the nearest snapshot at or before it and the deltas in between:
+    never more than SNAPSHOT_INTERVAL rows, in one query.
+    """
+    revisions = db.session.execute(
+        select(CharacterRevision)
+        .options(undefer(CharacterRevision.snapshot))
+        .where(CharacterRevision.character_id == character_id,
+               CharacterRevision.number.between(_snapshot_number(number), number))
+        .order_by(CharacterRevision.number)
+    ).scalars().all()
+    if not revisions or revisions[-1].number != number:
+        return None
+    state = json.loads(revisions[0].snapshot)
+    for revision in revisions[1:]:
+        state.update(json.loads(revision.changes))
+    return state
+
+
+def diff_revisions(character_id, old, new):
+    """{field: [value at ``old``, value at ``new``]} for the fields that differ, or None if either is missing."""
+    before, after = character_at(character_id, old), character_at(character_id, new)
+    if before is None or after is None:
+        return None
+    return {field: [before.get(field), after.get(field)]
+            for field in REVISION_FIELDS if before.get(field) != after.get(field)}
+
+
+def list_revisions(character_id, before=None, limit=DEFAULT_PAGE_SIZE):
+    """One page of the character's revisions, newest first, without rebuilding any state."""
+    stmt = (
+        select(CharacterRevision)
+        .options(joinedload(CharacterRevision.editor))
+        .where(CharacterRevision.character_id == character_id)
+    )
+    if before:
+        stmt = stmt.where(CharacterRevision.number < before)
+    revisions = db.session.execute(
+        stmt.order_by(CharacterRevision.number.desc()).limit(limit + 1)
+    ).scalars().all()
+    page = revisions[:limit]
+    return RevisionPage(page, page[-1].number if len(revisions) > limit else None)
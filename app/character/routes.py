@@ -1,15 +1,75 @@
-from flask import render_template, redirect, url_for, flash, request
+from flask import render_template, redirect, url_for, flash, request, jsonify, abort, current_app, stream_with_context
 from flask_login import login_required, current_user
 from app import db
+from app.access import accessible_campaign_ids, can_view_character, is_member
+from app.conditional import conditional, character_sheet_version, character_versions
 from app.character import bp
+from app.character import dice
 from app.models import Character, Campaign
+from app.models.character import ATTRIBUTES
 from app.character.forms import CharacterForm
+from app.character.queries import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, character_summaries, summary_to_dict
+from app.character import revisions
+from app.character.sheet import sheet_fragments
+from app.character.transfer import TRANSFER_FORMATS, export_characters, import_characters, iter_csv, iter_json, result_to_dict
+from sqlalchemy.orm import undefer_group
+
+def _summary_page():
+    """Load the page of the user's characters described by the request's cursor arguments."""
+    limit = min(max(request.args.get('per_page', DEFAULT_PAGE_SIZE, type=int), 1), MAX_PAGE_SIZE)
+    try:
+        return character_summaries(current_user.id, cursor=request.args.get('cursor'), limit=limit)
+    except ValueError:
+        abort(400)
 
 @bp.route('/characters')
 @login_required
 def list_characters():
-    characters = Character.query.filter_by(user_id=current_user.id).all()
-    return render_template('character/list.html', characters=characters)
+    """The user's characters, newest first, one keyset page at a time."""
+    page = _summary_page()
+    return render_template('character/list.html', characters=page.entries, next_cursor=page.next_cursor)
+
+@bp.route('/api/characters')
+@login_required
+def summaries():
+    """JSON variant of the character list."""
+    page = _summary_page()
+    return jsonify({
+        'characters': [summary_to_dict(row) for row in page.entries],
+        'next_cursor': page.next_cursor
+    })
+
+@bp.route('/import', methods=['POST'])
+@login_required
+def bulk_import():
+    """Create characters from an uploaded or streamed JSON / NDJSON / CSV body."""
+    upload = request.files.get('file')
+    if upload:
+        stream, filename, mimetype = upload.stream, upload.filename or '', upload.mimetype
+    else:
+        stream, filename, mimetype = request.stream, '', request.mimetype
+    import_format = request.args.get('format') or (
+        'csv' if filename.endswith('.csv') or mimetype == 'text/csv' else 'json')
+    if import_format not in ('json', 'ndjson', 'csv'):
+        return jsonify({'error': f'Unknown import format: {import_format}'}), 400
+    
+    rows = iter_csv(stream) if import_format == 'csv' else iter_json(stream)
+    result = import_characters(rows, current_user.id)
+    return jsonify({'success': result.error_count == 0, **result_to_dict(result)})
+
+@bp.route('/export')
+@login_required
+def bulk_export():
+    """Stream all of the user's characters as NDJSON or CSV, ready for /character/import."""
+    export_format = request.args.get('format', 'ndjson')
+    if export_format not in TRANSFER_FORMATS:
+        return jsonify({'error': f'Unknown export format: {export_format}'}), 400
+    
+    mimetype, extension = TRANSFER_FORMATS[export_format]
+    chunks = export_characters(current_user.id, export_format)
+    response = current_app.response_class(stream_with_context(chunks), mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename=characters.{extension}'
+    return response
 
 @bp.route('/create', methods=['GET', 'POST'])
 @login_required
@@ -38,6 +98,7 @@ def create():
                     user_id=current_user.id
                 )
                 db.session.add(character)
+                revisions.record_revision(character, current_user.id)
                 db.session.commit()
                 flash('Your character has been created!', 'success')
                 return redirect(url_for('character.list_characters'))
@@ -64,9 +125,9 @@ def join_campaign(character_id, campaign_id):
         flash('You cannot modify this character.', 'error')
         return redirect(url_for('character.list_characters'))
     
-    if campaign.dm_id != current_user.id and current_user not in campaign.players:
+    if not is_member(campaign.id):
         flash('You are not a member of this campaign.', 'error')
-        return redirect(url_for('campaign.list_campaigns'))
+        return redirect(url_for('campaign.index'))
     
     # Update character's campaign
     character.campaign_id = campaign_id
@@ -93,26 +154,95 @@ def leave_campaign(character_id):
 
 @bp.route('/<int:character_id>')
 @login_required
+@conditional(character_versions)
 def view(character_id):
-    character = Character.query.get_or_404(character_id)
+    """The character sheet, with its body and inventory panel served from the fragment cache."""
+    character = character_sheet_version(character_id)
+    if character is None:
+        abort(404)
     if character.user_id != current_user.id:
         flash('You cannot view this character.', 'error')
         return redirect(url_for('character.list_characters'))
     
+    sheet, inventory = sheet_fragments(character)
+    
     # Get available campaigns for the character to join
-    available_campaigns = Campaign.query.filter(
-        (Campaign.dm_id == current_user.id) | 
-        (Campaign.players.any(id=current_user.id))
-    ).all()
+    available_campaigns = []
+    if character.campaign_id is None:
+        campaign_ids = accessible_campaign_ids()
+        available_campaigns = Campaign.query.filter(Campaign.id.in_(campaign_ids)).all() if campaign_ids else []
     
     return render_template('character/view.html', 
                          character=character, 
+                         sheet=sheet,
+                         inventory=inventory,
                          available_campaigns=available_campaigns)
 
+# Largest batch one request may roll, and the largest that lists every total
+MAX_ROLLS = 10000
+MAX_LISTED_ROLLS = 100
+
+def _roll_response(die, wild_card):
+    """Roll ``count`` trait tests of ``die`` and return the results with the exact odds."""
+    try:
+        size, die_modifier = dice.parse_die(die)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    count = request.args.get('count', 1, type=int)
+    modifier = die_modifier + request.args.get('modifier', 0, type=int)
+    target = request.args.get('target', dice.TARGET_NUMBER, type=int)
+    wild_card = request.args.get('wild_card', '1' if wild_card else '0') == '1'
+    if not 1 <= count <= MAX_ROLLS:
+        return jsonify({'error': f'count must be between 1 and {MAX_ROLLS}'}), 400
+    if abs(modifier) > dice.MAX_MODIFIER:
+        return jsonify({'error': f'modifier must be between -{dice.MAX_MODIFIER} and {dice.MAX_MODIFIER}'}), 400
+    if not dice.MIN_TARGET <= target <= dice.MAX_TARGET:
+        return jsonify({'error': f'target must be between {dice.MIN_TARGET} and {dice.MAX_TARGET}'}), 400
+    
+    rolls = dice.roll(size, count, modifier, wild_card, target)
+    result = {
+        'die': f'd{size}',
+        'modifier': modifier,
+        'wild_card': wild_card,
+        'target': target,
+        'count': count,
+        'results': dice.summarize(rolls.outcomes),
+        'odds': dict(zip(dice.OUTCOMES, dice.odds(size, modifier, wild_card, target)))
+    }
+    if count <= MAX_LISTED_ROLLS:
+        result['totals'] = rolls.totals.tolist()
+        result['outcomes'] = rolls.outcomes.tolist()
+    return jsonify(result)
+
+@bp.route('/<int:character_id>/roll')
+@login_required
+def roll(character_id):
+    """Trait tests with one of the character's attributes; characters roll as Wild Cards."""
+    trait = request.args.get('trait', '')
+    if trait not in ATTRIBUTES:
+        return jsonify({'error': f'trait must be one of {", ".join(ATTRIBUTES)}'}), 400
+    row = db.session.execute(
+        db.select(Character.user_id, Character.campaign_id, getattr(Character, trait))
+        .where(Character.id == character_id)
+    ).first()
+    if row is None:
+        return jsonify({'error': 'Character not found'}), 404
+    if not can_view_character(row):
+        return jsonify({'error': 'You cannot roll for this character'}), 403
+    if row[2] is None:
+        return jsonify({'error': f'{trait} is not set'}), 400
+    return _roll_response(row[2], wild_card=True)
+
+@bp.route('/roll')
+@login_required
+def roll_dice():
+    """Trait tests with any die, e.g. a squad of extras; rolls without a Wild Die by default."""
+    return _roll_response(request.args.get('die', ''), wild_card=False)
+
 @bp.route('/<int:character_id>/edit', methods=['GET', 'POST'])
 @login_required
 def edit(character_id):
-    character = Character.query.get_or_404(character_id)
+    character = Character.query.options(undefer_group('details')).get_or_404(character_id)
     if character.user_id != current_user.id:
         flash('You cannot edit this character.', 'error')
         return redirect(url_for('character.list_characters'))
@@ -134,12 +264,56 @@ def edit(character_id):
         character.money = form.money.data
         character.background = form.background.data
         character.notes = form.notes.data
+        revisions.record_revision(character, current_user.id)
         db.session.commit()
         flash('Your character has been updated!', 'success')
         return redirect(url_for('character.view', character_id=character.id))
     
     return render_template('character/edit.html', form=form, character=character)
 
+def _own_character_id(character_id):
+    """404 unless the character exists, 403 unless it belongs to the current user."""
+    user_id = db.session.execute(db.select(Character.user_id).where(Character.id == character_id)).scalar()
+    if user_id is None:
+        abort(404)
+    if user_id != current_user.id:
+        abort(403)
+    return character_id
+
+@bp.route('/<int:character_id>/revisions')
+@login_required
+def revision_history(character_id):
+    """The character's revisions, newest first, with the fields each one changed."""
+    _own_character_id(character_id)
+    limit = min(max(request.args.get('per_page', revisions.DEFAULT_PAGE_SIZE, type=int), 1), revisions.MAX_PAGE_SIZE)
+    page = revisions.list_revisions(character_id, before=request.args.get('before', type=int), limit=limit)
+    return jsonify({
+        'revisions': [revision.to_dict() for revision in page.revisions],
+        'next_before': page.next_before
+    })
+
+@bp.route('/<int:character_id>/revisions/<int:number>')
+@login_required
+def revision(character_id, number):
+    """The character as it was at one revision."""
+    _own_character_id(character_id)
+    state = revisions.character_at(character_id, number)
+    if state is None:
+        return jsonify({'error': 'Revision not found'}), 404
+    return jsonify({'number': number, 'character': state})
+
+@bp.route('/<int:character_id>/revisions/diff')
+@login_required
+def revision_diff(character_id):
+    """Fields that differ between two revisions; defaults to the latest edit."""
+    _own_character_id(character_id)
+    new = request.args.get('to', type=int) or revisions.latest_number(character_id)
+    old = request.args.get('from', new - 1, type=int)
+    changes = revisions.diff_revisions(character_id, old, new)
+    if changes is None:
+        return jsonify({'error': 'Revision not found'}), 404
+    return jsonify({'from': old, 'to': new, 'changes': changes})
+
 @bp.route('/<int:character_id>/delete')
 @login_required
 def delete(character_id):
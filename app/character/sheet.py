@@ -0,0 +1,52 @@
+from flask import render_template
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload, undefer_group
+
+from app import db
+from app.caching import cached_fragments
+from app.models import Character, CharacterInventory
+
+# Rendered sheet body and inventory panel, keyed by the versions they are
+# drawn from: editing the character or its inventory moves to a new key,
+# so nothing needs to be deleted and every worker sees the same entries.
+SHEET_KEY = 'fragment:character:{character_id}:sheet:{updated_at}'
+INVENTORY_KEY = 'fragment:character:{character_id}:inventory:{count}:{updated_at}'
+
+
+def _stamp(value):
+    return value.isoformat() if value else '-'
+
+
+def _render_sheet(character_id):
+    character = db.session.execute(
+        select(Character).options(undefer_group('details')).where(Character.id == character_id)
+    ).scalar_one()
+    return render_template('character/_sheet.html', character=character)
+
+
+def _render_inventory(character_id):
+    inventory = db.session.execute(
+        select(CharacterInventory)
+        .options(joinedload(CharacterInventory.item))
+        .where(CharacterInventory.character_id == character_id)
+        .order_by(CharacterInventory.equipped.desc(), CharacterInventory.id)
+    ).scalars().all()
+    total_weight = sum((entry.item.weight or 0) * (entry.quantity or 0) for entry in inventory)
+    return render_template('character/_inventory_panel.html', character_id=character_id,
+                           inventory=inventory, total_weight=total_weight)
+
+
+def sheet_fragments(version):
+    """(sheet body, inventory panel) for a character_sheet_version() row.
+
+    Cache hits cost one get_many; only missing fragments load their rows
+    and render.
+    """
+    character_id = version.id
+    return cached_fragments({
+        SHEET_KEY.format(character_id=character_id, updated_at=_stamp(version.updated_at)):
+            lambda: _render_sheet(character_id),
+        INVENTORY_KEY.format(character_id=character_id, count=version.inventory_count,
+                             updated_at=_stamp(version.inventory_updated_at)):
+            lambda: _render_inventory(character_id),
+    })
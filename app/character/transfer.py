@@ -0,0 +1,310 @@
+"""Bulk character import and export as NDJSON / JSON arrays or CSV.
+
+Imports are parsed as the body streams in, checked against validators
+compiled once from CharacterForm's field definitions, and inserted in
+chunks of one multi-row INSERT and one commit each.
+"""
+import csv
+import io
+import json
+import logging
+from collections import namedtuple
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from wtforms import IntegerField
+from wtforms.validators import DataRequired, InputRequired, Length, NumberRange
+
+from app import db
+from app.caching import invalidate_on_commit
+from app.campaign.export import EXPORT_CHUNK_SIZE, buffered
+from app.character.forms import CharacterForm
+from app.models import Character
+from app.models.character import ATTRIBUTES, REVISION_FIELDS, die_label, die_value
+
+IMPORT_FIELDS = REVISION_FIELDS
+IMPORT_CHUNK_SIZE = 500
+READ_SIZE = 64 * 1024
+# Longest single JSON row, in characters, that an import will buffer
+MAX_ROW_SIZE = 1024 * 1024
+# Rows reported individually in an import result; the rest are only counted
+MAX_REPORTED_ERRORS = 1000
+
+EXPORT_FIELDS = ('id', *IMPORT_FIELDS, 'campaign_id', 'created_at', 'updated_at')
+TRANSFER_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv', 'csv'),
+}
+
+ImportResult = namedtuple('ImportResult', 'rows ids errors error_count')
+
+
+def _field_check(unbound):
+    """Turn one of CharacterForm's unbound fields into a ``check(raw) -> (value, errors)`` function.
+
+    Mirrors what the form does with the same validators: DataRequired,
+    Optional, Length, NumberRange, SelectField choices and IntegerField
+    coercion.
+    """
+    validators = unbound.kwargs.get('validators') or ()
+    required = next((v for v in validators if isinstance(v, (DataRequired, InputRequired))), None)
+    lengths = [v for v in validators if isinstance(v, Length)]
+    ranges = [v for v in validators if isinstance(v, NumberRange)]
+    choices = unbound.kwargs.get('choices')
+    allowed = {value for value, _ in choices} if choices else None
+    integer = issubclass(unbound.field_class, IntegerField)
+    default = unbound.kwargs.get('default') if integer else None
+
+    def check(raw):
+        value = raw.strip() if isinstance(raw, str) else raw
+        if value is None or value == '':
+            if required is not None:
+                return None, [required.message or 'This field is required.']
+            return default, []
+        if integer:
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                return None, ['Not a valid integer value.']
+        elif not isinstance(value, str):
+            value = str(value)
+        if allowed is not None and value not in allowed:
+            return None, ['Not a valid choice.']
+        errors = []
+        for v in lengths:
+            if len(value) < v.min or (v.max != -1 and len(value) > v.max):
+                errors.append(v.message or f'Field must be between {v.min} and {v.max} characters long.')
+        for v in ranges:
+            if (v.min is not None and value < v.min) or (v.max is not None and value > v.max):
+                errors.append(v.message or f'Number must be between {v.min} and {v.max}.')
+        return value, errors
+
+    return check
+
+
+FIELD_CHECKS = {name: _field_check(getattr(CharacterForm, name)) for name in IMPORT_FIELDS}
+
+
+def validate_row(row):
+    """Check one imported row with CharacterForm's rules.
+
+    Returns (column values ready to insert, {field: [messages]}). Keys
+    that are not character fields, such as an exported id, are ignored.
+    """
+    if not isinstance(row, dict):
+        return None, {'row': ['Each row must be an object']}
+    values, errors = {}, {}
+    for name, check in FIELD_CHECKS.items():
+        value, messages = check(row.get(name))
+        if messages:
+            errors[name] = messages
+        elif name in ATTRIBUTES:
+            values[name] = die_value(value)
+        else:
+            values[name] = value
+    return values, errors
+
+
+def _iter_json_array(text, buffer, size, limit):
+    decoder = json.JSONDecoder()
+    position, eof = 0, False
+    while True:
+        while position < len(buffer) and buffer[position] in ' \t\r\n,':
+            position += 1
+        if buffer.startswith(']', position):
+            return
+        if position < len(buffer):
+            try:
+                row, end = decoder.raw_decode(buffer, position)
+            except ValueError:
+                if eof:
+                    raise
+            else:
+                # A value running to the end of the buffer may continue in the next read
+                if end < len(buffer) or eof:
+                    yield row
+                    position = end
+                    continue
+        elif eof:
+            raise ValueError('Expected ] at the end of the array')
+        if len(buffer) - position > limit:
+            raise ValueError(f'Row is longer than {limit} characters')
+        chunk = text.read(size)
+        eof = not chunk
+        buffer, position = buffer[position:] + chunk, 0
+
+
+def _iter_json_lines(text, buffer, size, limit):
+    eof = False
+    while True:
+        end = buffer.find('\n')
+        while end == -1 and not eof:
+            if len(buffer) > limit:
+                raise ValueError(f'Row is longer than {limit} characters')
+            start = len(buffer)
+            chunk = text.read(size)
+            eof = not chunk
+            buffer += chunk
+            end = buffer.find('\n', start)
+        if end == -1:
+            end = len(buffer)
+        line, buffer = buffer[:end], buffer[end + 1:]
+        if len(line) > limit:
+            raise ValueError(f'Row is longer than {limit} characters')
+        if line.strip():
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f'Each line must be one JSON object ({e})') from e
+            if not isinstance(row, dict):
+                raise ValueError('Each line must be one JSON object')
+            if not row.keys() & FIELD_CHECKS.keys() and any(isinstance(value, list) for value in row.values()):
+                raise ValueError('Expected one character per line, not an object wrapping a list of them')
+            yield row
+        if eof and not buffer:
+            return
+
+
+def iter_json(stream, size=READ_SIZE, limit=MAX_ROW_SIZE):
+    """Objects from a JSON array or newline-delimited JSON, decoded as the stream is read.
+
+    A top-level value that is neither is rejected: scalars before they are
+    read in, and objects wrapping the rows (on one line or spread over many)
+    at their first line. So is a row longer than ``limit`` characters, so at
+    most one row is ever buffered.
+    """
+    text = io.TextIOWrapper(stream, encoding='utf-8')
+    buffer = ''
+    while not buffer:
+        chunk = text.read(size)
+        if not chunk:
+            return
+        buffer = chunk.lstrip()
+    if buffer[0] == '[':
+        yield from _iter_json_array(text, buffer[1:], size, limit)
+    elif buffer[0] == '{':
+        yield from _iter_json_lines(text, buffer, size, limit)
+    else:
+        raise ValueError('Expected a JSON array or one JSON object per line')
+
+
+def iter_csv(stream):
+    """Rows of a CSV file with a header line, as dicts."""
+    text = io.TextIOWrapper(stream, encoding='utf-8', newline='')
+    try:
+        yield from csv.DictReader(text)
+    except csv.Error as e:
+        raise ValueError(str(e)) from e
+
+
+def _insert_chunk(chunk, user_id):
+    """Insert (row number, values) pairs in one transaction; returns (ids, errors)."""
+    table = Character.__table__
+    stmt = insert(table).returning(table.c.id)
+    try:
+        ids = db.session.execute(stmt, [{**values, 'user_id': user_id} for _, values in chunk]).scalars().all()
+        invalidate_on_commit(db.session, ('user', user_id), ('global', 0))
+        db.session.commit()
+        return ids, []
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        if len(chunk) == 1:
+            logging.warning(f'Character import row {chunk[0][0]} failed: {e}')
+            return [], [(chunk[0][0], {'row': ['Could not be saved']})]
+    # Retry row by row so that one bad row does not sink the whole chunk
+    ids, errors = [], []
+    for pair in chunk:
+        row_ids, row_errors = _insert_chunk([pair], user_id)
+        ids += row_ids
+        errors += row_errors
+    return ids, errors
+
+
+def import_characters(rows, user_id, chunk_size=IMPORT_CHUNK_SIZE):
+    """Validate and insert characters for ``user_id`` from an iterable of row dicts.
+
+    Valid rows are committed ``chunk_size`` at a time, so a failure part
+    way through keeps the chunks before it. Malformed input stops the
+    import at the row where it was found.
+    """
+    ids, errors, error_count, chunk, number = [], [], 0, [], 0
+
+    def report(row_errors):
+        nonlocal error_count
+        error_count += len(row_errors)
+        errors.extend(row_errors[:max(MAX_REPORTED_ERRORS - len(errors), 0)])
+
+    def flush():
+        chunk_ids, chunk_errors = _insert_chunk(chunk, user_id)
+        ids.extend(chunk_ids)
+        report(chunk_errors)
+        chunk.clear()
+
+    rows = iter(rows)
+    while True:
+        try:
+            row = next(rows)
+        except StopIteration:
+            break
+        except ValueError as e:
+            report([(number + 1, {'row': [f'Malformed input: {e}']})])
+            break
+        number += 1
+        values, row_errors = validate_row(row)
+        if row_errors:
+            report([(number, row_errors)])
+            continue
+        chunk.append((number, values))
+        if len(chunk) >= chunk_size:
+            flush()
+    if chunk:
+        flush()
+    return ImportResult(number, ids, errors, error_count)
+
+
+def result_to_dict(result):
+    return {
+        'rows': result.rows,
+        'created': len(result.ids),
+        'ids': result.ids,
+        'error_count': result.error_count,
+        'errors': [{'row': number, 'errors': row_errors} for number, row_errors in result.errors],
+    }
+
+
+def _export_rows(user_id, chunk_size):
+    table = Character.__table__
+    stmt = (
+        select(*(table.c[name] for name in EXPORT_FIELDS))
+        .where(table.c.user_id == user_id)
+        .order_by(table.c.created_at, table.c.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    for row in db.session.execute(stmt):
+        row = dict(row._mapping)
+        row.update((name, die_label(row[name])) for name in ATTRIBUTES)
+        row.update((name, row[name].isoformat()) for name in ('created_at', 'updated_at') if row[name])
+        yield row
+
+
+def _iter_ndjson(rows):
+    for row in rows:
+        yield json.dumps(row) + '\n'
+
+
+def _iter_csv(rows):
+    line = io.StringIO()
+    writer = csv.DictWriter(line, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield line.getvalue()
+        line.seek(0)
+        line.truncate()
+    yield line.getvalue()
+
+
+def export_characters(user_id, export_format='ndjson', chunk_size=EXPORT_CHUNK_SIZE):
+    """Generator of export chunks with every character of ``user_id``, in a format import_characters reads."""
+    render = _iter_csv if export_format == 'csv' else _iter_ndjson
+    return buffered(render(_export_rows(user_id, chunk_size)))
@@ -0,0 +1,150 @@
+import hashlib
+import time
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import current_app, g, has_request_context, make_response, request, session
+from flask_login import current_user
+from sqlalchemy import func, select
+
+from app import cache, db
+from app.access import can_view_campaign, can_view_character
+from app.caching import get_generations
+from app.models import Campaign, Character, CharacterInventory, CampaignNote, Map
+
+# Strong ETags a view computed itself (e.g. from its body), remembered per
+# version digest so that later requests can be answered without the view
+STRONG_ETAG_KEY = 'etag:{digest}'
+STRONG_ETAG_TIMEOUT = 3600
+
+
+def _children(model, parent_column, parent_id):
+    """Row count and newest updated_at of the rows pointing at ``parent_id``."""
+    condition = parent_column == parent_id
+    return (select(func.count()).select_from(model).where(condition).scalar_subquery(),
+            select(func.max(model.updated_at)).where(condition).scalar_subquery())
+
+
+def campaign_versions(campaign_id):
+    """Everything the campaign page and bundle are built from, in one query."""
+    if not can_view_campaign(campaign_id):
+        return None
+    row = db.session.execute(
+        select(Campaign.version, Campaign.updated_at, Campaign.member_count,
+               *_children(CampaignNote, CampaignNote.campaign_id, campaign_id),
+               *_children(Map, Map.campaign_id, campaign_id),
+               *_children(Character, Character.campaign_id, campaign_id))
+        .where(Campaign.id == campaign_id)
+    ).first()
+    return tuple(row) if row else None
+
+
+def character_sheet_version(character_id):
+    """The character page's version row, in one query, remembered for the rest of the request.
+
+    Carries the owner, the character's updated_at, its campaign (name,
+    description and updated_at) and its inventory's row count and newest
+    updated_at: everything needed to decide whether the page or its cached
+    fragments are still current.
+    """
+    memo = g.setdefault('_character_sheet_versions', {}) if has_request_context() else {}
+    if character_id not in memo:
+        inventory_count, inventory_updated_at = _children(
+            CharacterInventory, CharacterInventory.character_id, character_id)
+        memo[character_id] = db.session.execute(
+            select(Character.id, Character.user_id, Character.name, Character.updated_at, Character.campaign_id,
+                   Campaign.name.label('campaign_name'), Campaign.description.label('campaign_description'),
+                   Campaign.updated_at.label('campaign_updated_at'),
+                   inventory_count.label('inventory_count'), inventory_updated_at.label('inventory_updated_at'))
+            .outerjoin(Campaign, Campaign.id == Character.campaign_id)
+            .where(Character.id == character_id)
+        ).first()
+    return memo[character_id]
+
+
+def character_versions(character_id):
+    """The character, its campaign, its inventory and the owner's campaign list (via the user generation)."""
+    row = character_sheet_version(character_id)
+    if row is None or str(row.user_id) != current_user.get_id():
+        return None
+    return (row.updated_at, row.campaign_id, row.campaign_updated_at, row.inventory_count,
+            row.inventory_updated_at, *get_generations([('user', row.user_id)]))
+
+
+def inventory_versions(character_id):
+    """The character's inventory rows, in one query."""
+    row = db.session.execute(
+        select(Character.user_id, Character.campaign_id,
+               *_children(CharacterInventory, CharacterInventory.character_id, character_id))
+        .where(Character.id == character_id)
+    ).first()
+    if row is None or not can_view_character(row):
+        return None
+    return tuple(row)
+
+
+def _digest(parts):
+    user_id = current_user.get_id() if current_user.is_authenticated else None
+    # Pages embed CSRF tokens, which are tied to the session and expire:
+    # a cached copy must not outlive the token it carries
+    csrf_window = current_app.config.get('WTF_CSRF_TIME_LIMIT') or 3600
+    csrf = (session.get('csrf_token'), int(time.time() // (csrf_window / 2)))
+    return hashlib.sha1(repr((request.full_path, user_id, csrf, parts)).encode()).hexdigest()
+
+
+def _not_modified(etag, last_modified):
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def conditional(versions):
+    """Answer conditional GETs from a version lookup, before the view runs.
+
+    ``versions`` receives the view's keyword arguments and returns a tuple
+    that changes whenever the response would, or None to leave the request
+    to the view (missing rows, no access). The ETag is a weak digest of the
+    tuple, the user and the URL; Last-Modified is its newest timestamp.
+    Matching If-None-Match / If-Modified-Since headers get a 304 without
+    rendering. Views that set their own strong ETag keep it, and it is
+    remembered against the digest for the next request.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            # Pages carrying flashed messages must be rendered to show them
+            if request.method not in ('GET', 'HEAD') or session.get('_flashes'):
+                return f(*args, **kwargs)
+            parts = versions(**kwargs)
+            if parts is None:
+                return f(*args, **kwargs)
+
+            digest = _digest(parts)
+            etag, weak = cache.get(STRONG_ETAG_KEY.format(digest=digest)) or (digest, True)
+            timestamps = [part for part in parts if isinstance(part, datetime)]
+            last_modified = max(timestamps).replace(microsecond=0, tzinfo=timezone.utc) if timestamps else None
+
+            if _not_modified(etag, last_modified):
+                response = current_app.response_class(status=304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                # Rendering may have issued the session its CSRF token
+                digest = _digest(parts)
+                etag, weak = digest, True
+                if response.headers.get('ETag'):
+                    strong_etag, is_weak = response.get_etag()
+                    if not is_weak:
+                        cache.set(STRONG_ETAG_KEY.format(digest=digest), (strong_etag, False),
+                                  timeout=STRONG_ETAG_TIMEOUT)
+                    etag, weak = strong_etag, is_weak
+            response.set_etag(etag, weak=weak)
+            if last_modified:
+                response.last_modified = last_modified
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+        return decorated_function
+    return decorator
@@ -0,0 +1,116 @@
+import re
+import time
+from collections import Counter
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_WHITESPACE = re.compile(r'\s+')
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+# IN (?, ?, ?) / IN (%(p_1)s, ...) / expanded :param lists collapse to a single placeholder
+_PLACEHOLDER_LIST = re.compile(r'\(\s*(?:\?|%\(\w+\)s|%s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|%s|:\w+))+\s*\)')
+
+
+def fingerprint(statement):
+    """Normalise a SQL statement so that repeats differing only in values compare equal."""
+    statement = _WHITESPACE.sub(' ', statement).strip()
+    statement = _STRING_LITERAL.sub('?', statement)
+    statement = _NUMBER_LITERAL.sub('?', statement)
+    return _PLACEHOLDER_LIST.sub('(?)', statement)
+
+
+class RequestQueryStats:
+    """SQL statements executed while handling one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+
+    def record(self, statement, duration):
+        self.count += 1
+        self.duration += duration
+        self.fingerprints[fingerprint(statement)] += 1
+
+    def repeated(self, threshold):
+        """Statements executed at least ``threshold`` times: likely N+1 patterns."""
+        return [(statement, count) for statement, count in self.fingerprints.most_common()
+                if count >= threshold]
+
+
+def current_query_stats():
+    """Return the RequestQueryStats of the active request, if instrumented."""
+    return g.get('_sql_stats') if has_request_context() else None
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and '_sql_stats' in g:
+        conn.info.setdefault('_query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('_query_start')
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    stats = current_query_stats()
+    if stats is not None:
+        stats.record(statement, duration)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    # A failed statement never reaches after_cursor_execute, so drop its start
+    # here or the next statement on this connection is timed from it
+    conn = context.connection
+    starts = conn.info.get('_query_start') if conn is not None else None
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    stats = current_query_stats()
+    if stats is not None and context.statement:
+        stats.record(context.statement, duration)
+
+
+def _start_request_stats():
+    g._sql_stats = RequestQueryStats()
+
+
+def _finish_request_stats(response):
+    stats = current_query_stats()
+    if stats is None:
+        return response
+    config = current_app.config
+    db_ms = stats.duration * 1000
+    total_ms = (time.perf_counter() - stats.started) * 1000
+
+    if config['SERVER_TIMING']:
+        response.headers.add('Server-Timing', f'db;dur={db_ms:.2f};desc="{stats.count} queries"')
+        response.headers.add('Server-Timing', f'app;dur={total_ms:.2f}')
+
+    repeated = stats.repeated(config['SQL_N_PLUS_ONE_THRESHOLD'])
+    for statement, count in repeated:
+        current_app.logger.warning(
+            f'Possible N+1 query in {request.endpoint}: executed {count} times: {statement[:300]}')
+    if stats.count >= config['SQL_QUERY_COUNT_THRESHOLD'] or db_ms >= config['SQL_TIME_THRESHOLD_MS']:
+        current_app.logger.warning(
+            f'{request.method} {request.path} ({request.endpoint}) ran {stats.count} queries '
+            f'taking {db_ms:.1f} ms of {total_ms:.1f} ms')
+    return response
+
+
+def init_instrumentation(app):
+    """Count and time the SQL executed by each request.
+
+    Adds a Server-Timing header and logs requests whose statement count or
+    database time exceed the configured thresholds, as well as statements
+    repeated often enough to suggest an N+1 query.
+    """
+    if app.config['SQL_INSTRUMENTATION']:
+        app.before_request(_start_request_stats)
+        app.after_request(_finish_request_stats)
@@ -1,24 +1,29 @@
 from flask import render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
-from app import db, cache
+from app import db
 from app.inventory import bp
-from app.models import Character, Item, CharacterInventory, Campaign
+from app.models import Character, Item, CharacterInventory
+from app.caching import cached_view
+from app.access import can_view_character
+from app.conditional import conditional, inventory_versions
 import logging
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 
 @bp.route('/inventory/<int:character_id>')
 @login_required
-@cache.cached(timeout=30)
+@conditional(inventory_versions)
+@cached_view(timeout=300, depends=lambda character_id: [('character', character_id)])
 def view_inventory(character_id):
     """View a character's inventory."""
     character = Character.query.get_or_404(character_id)
-    campaign = Campaign.query.get_or_404(character.campaign_id)
     
-    if not campaign.is_member(current_user):
+    if not can_view_character(character):
         flash('You do not have access to this inventory.', 'error')
         return redirect(url_for('main.index'))
     
-    inventory = CharacterInventory.query.filter_by(character_id=character_id).all()
+    inventory = CharacterInventory.query.options(
+        joinedload(CharacterInventory.item)
+    ).filter_by(character_id=character_id).all()
     return render_template('inventory/view.html',
                          character=character,
                          inventory=inventory,
@@ -119,15 +124,17 @@ def toggle_equipped(character_id, inventory_id):
 
 @bp.route('/api/inventory/<int:character_id>')
 @login_required
+@conditional(inventory_versions)
 def get_inventory(character_id):
     """API endpoint to get character's inventory."""
     character = Character.query.get_or_404(character_id)
-    campaign = Campaign.query.get_or_404(character.campaign_id)
     
-    if not campaign.is_member(current_user):
+    if not can_view_character(character):
         return jsonify({'error': 'Access denied'}), 403
     
-    inventory = CharacterInventory.query.filter_by(character_id=character_id).all()
+    inventory = CharacterInventory.query.options(
+        joinedload(CharacterInventory.item)
+    ).filter_by(character_id=character_id).all()
     inventory_data = []
     
     for item in inventory:
@@ -1,13 +1,16 @@
-from flask import render_template, redirect, url_for, current_app
+from flask import render_template, redirect, url_for, current_app, jsonify, abort
 from flask_login import login_required, current_user
-from app import cache, limiter
+from app import db, limiter
+from app.pool import pool_status
+from app.caching import cached_view
 from app.main import bp
 from app.models import Campaign, Character
+from app.character.queries import character_summaries, count_characters
 import logging
 
 @bp.route('/')
 @bp.route('/index')
-@cache.cached(timeout=60)
+@cached_view(timeout=300, depends=lambda: [('global', 0)])
 def index():
     """Home page with recent activity and statistics."""
     try:
@@ -23,9 +26,7 @@ def index():
                 Campaign.members.any(id=current_user.id)
             ).order_by(Campaign.created_at.desc()).limit(5).all()
             
-            recent_characters = Character.query.filter_by(
-                user_id=current_user.id
-            ).order_by(Character.created_at.desc()).limit(5).all()
+            recent_characters = character_summaries(current_user.id, limit=5).entries
         else:
             recent_campaigns = []
             recent_characters = []
@@ -56,12 +57,12 @@ def index():
 
 @bp.route('/dashboard')
 @login_required
-@cache.cached(timeout=30)
+@cached_view(timeout=300)
 def dashboard():
     """User dashboard with their campaigns and characters."""
     try:
         user_campaigns = current_user.campaigns.all()
-        user_characters = current_user.characters.all()
+        user_characters = character_summaries(current_user.id).entries
         owned_campaigns = current_user.owned_campaigns.all()
         
         campaign_stats = {
@@ -70,11 +71,7 @@ def dashboard():
             'participating': len(user_campaigns) - len(owned_campaigns)
         }
         
-        character_stats = {
-            'total': len(user_characters),
-            'in_campaign': sum(1 for c in user_characters if c.campaign_id is not None),
-            'available': sum(1 for c in user_characters if c.campaign_id is None)
-        }
+        character_stats = count_characters(current_user.id)._asdict()
         
         return render_template('main/dashboard.html',
                              campaigns=user_campaigns,
@@ -95,3 +92,14 @@ def about():
 def help():
     """Help page with documentation and guides."""
     return render_template('main/help.html')
+
+@bp.route('/metrics/pool')
+@limiter.exempt
+def pool_metrics():
+    """Live connection pool statistics for this worker process."""
+    if not current_app.config.get('METRICS_ENABLED'):
+        abort(404)
+    return jsonify({
+        (key or 'default'): pool_status(engine)
+        for key, engine in db.engines.items()
+    })
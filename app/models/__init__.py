@@ -1,17 +1,22 @@
 from .user import User
-from .character import Character
-from .campaign import Campaign, campaign_members
+from .character import Character, CharacterRevision
+from .campaign import Campaign, CampaignRace, CampaignEdge, campaign_members, CAMPAIGN_FULL
 from .item import Item, CharacterInventory
 from .map import Map
-from .note import CampaignNote
+from .note import CampaignNote, CampaignNoteArchive
 
 __all__ = [
     'User',
     'Character',
+    'CharacterRevision',
     'Campaign',
+    'CampaignRace',
+    'CampaignEdge',
     'campaign_members',
+    'CAMPAIGN_FULL',
     'Item',
     'CharacterInventory',
     'Map',
-    'CampaignNote'
+    'CampaignNote',
+    'CampaignNoteArchive'
 ]
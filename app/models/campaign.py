@@ -1,7 +1,6 @@
 from app import db
 from datetime import datetime
-from sqlalchemy import Index
-import json
+from sqlalchemy import DDL, Index, event
 
 # Association table for campaign members
 campaign_members = db.Table('campaign_members',
@@ -18,16 +17,22 @@ class Campaign(db.Model):
     description = db.Column(db.String(500), nullable=False)
     setting = db.Column(db.String(100))
     
-    # Campaign Rules
+    # Campaign Rules. Allowed races and edges live in campaign_race and
+    # campaign_edge; an empty list means anything goes.
     power_level = db.Column(db.String(50), default='Novice')
-    available_races = db.Column(db.String(1000))
-    available_edges = db.Column(db.String(1000))
     house_rules = db.Column(db.Text)
     
+    # Players, the owner included. member_count is maintained by triggers on
+    # campaign_members, which also refuse inserts once the campaign is full.
+    max_players = db.Column(db.Integer, nullable=False, default=6, server_default='6')
+    member_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
     # Campaign Status
     status = db.Column(db.String(20), default='draft')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     next_session = db.Column(db.DateTime)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     
     # Relationships
     characters = db.relationship('Character', back_populates='campaign', lazy='dynamic')
@@ -35,21 +40,32 @@ class Campaign(db.Model):
                           cascade='all, delete-orphan')
     maps = db.relationship('Map', backref='campaign', lazy='dynamic',
                          cascade='all, delete-orphan')
+    note_archive = db.relationship('CampaignNoteArchive', uselist=False, cascade='all, delete-orphan')
     members = db.relationship('User', secondary=campaign_members,
                             lazy='dynamic',
                             backref=db.backref('campaigns', lazy='dynamic'))
+    race_rules = db.relationship('CampaignRace', cascade='all, delete-orphan',
+                                 order_by='CampaignRace.race')
+    edge_rules = db.relationship('CampaignEdge', cascade='all, delete-orphan',
+                                 order_by='CampaignEdge.edge')
+    
+    __mapper_args__ = {'version_id_col': version}
     
     def get_available_races(self):
-        return json.loads(self.available_races) if self.available_races else []
+        return [rule.race for rule in self.race_rules]
     
     def set_available_races(self, races):
-        self.available_races = json.dumps(races)
+        # Keep the rows that stay: re-adding a deleted (campaign_id, race)
+        # key in the same flush would violate the primary key
+        existing = {rule.race: rule for rule in self.race_rules}
+        self.race_rules = [existing.get(race) or CampaignRace(race=race) for race in dict.fromkeys(races)]
     
     def get_available_edges(self):
-        return json.loads(self.available_edges) if self.available_edges else []
+        return [rule.edge for rule in self.edge_rules]
     
     def set_available_edges(self, edges):
-        self.available_edges = json.dumps(edges)
+        existing = {rule.edge: rule for rule in self.edge_rules}
+        self.edge_rules = [existing.get(edge) or CampaignEdge(edge=edge) for edge in dict.fromkeys(edges)]
     
     def to_dict(self):
         return {
@@ -59,11 +75,96 @@ class Campaign(db.Model):
             'setting': self.setting,
             'power_level': self.power_level,
             'status': self.status,
+            'max_players': self.max_players,
+            'member_count': self.member_count,
             'next_session': self.next_session.isoformat() if self.next_session else None,
             'owner': self.owner.to_dict() if self.owner else None
         }
 
+class CampaignRace(db.Model):
+    __tablename__ = 'campaign_race'
+    
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id', ondelete='CASCADE'), primary_key=True)
+    race = db.Column(db.String(50), primary_key=True)
+
+class CampaignEdge(db.Model):
+    __tablename__ = 'campaign_edge'
+    
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id', ondelete='CASCADE'), primary_key=True)
+    edge = db.Column(db.String(100), primary_key=True)
+
 # Create indexes for frequently queried fields
 Index('idx_campaign_owner_id', Campaign.owner_id)
 Index('idx_campaign_name', Campaign.name)
 Index('idx_campaign_status', Campaign.status)
+Index('idx_campaign_created_at', Campaign.created_at, Campaign.id)
+Index('idx_campaign_next_session', Campaign.next_session)
+# "Which campaigns allow race X"; the primary keys answer the reverse
+Index('idx_campaign_race_race', CampaignRace.race, CampaignRace.campaign_id)
+Index('idx_campaign_edge_edge', CampaignEdge.edge, CampaignEdge.campaign_id)
+
+# Seat accounting. Claiming a seat and inserting the membership happen in the
+# same statement, so concurrent joins cannot overfill a campaign: Postgres
+# re-checks the capacity condition after waiting for the campaign row lock,
+# and SQLite runs one writer at a time. Membership changes also touch
+# updated_at (but not version, which guards ORM updates) so that
+# conditional GETs of the campaign page see them.
+CAMPAIGN_FULL = 'campaign_full'
+
+SEAT_TRIGGERS = {
+    'sqlite': [
+        f"""
+        CREATE TRIGGER campaign_members_claim_seat BEFORE INSERT ON campaign_members
+        BEGIN
+            SELECT RAISE(ABORT, '{CAMPAIGN_FULL}')
+            WHERE (SELECT member_count >= max_players FROM campaign WHERE id = NEW.campaign_id);
+            UPDATE campaign SET member_count = member_count + 1,
+                                updated_at = strftime('%%Y-%%m-%%d %%H:%%M:%%f000', 'now')
+             WHERE id = NEW.campaign_id;
+        END
+        """,
+        """
+        CREATE TRIGGER campaign_members_release_seat AFTER DELETE ON campaign_members
+        BEGIN
+            UPDATE campaign SET member_count = member_count - 1,
+                                updated_at = strftime('%%Y-%%m-%%d %%H:%%M:%%f000', 'now')
+             WHERE id = OLD.campaign_id;
+        END
+        """,
+    ],
+    'postgresql': [
+        f"""
+        CREATE OR REPLACE FUNCTION campaign_members_claim_seat() RETURNS trigger AS $$
+        BEGIN
+            UPDATE campaign SET member_count = member_count + 1, updated_at = now() AT TIME ZONE 'utc'
+             WHERE id = NEW.campaign_id AND member_count < max_players;
+            IF NOT FOUND THEN
+                RAISE EXCEPTION '{CAMPAIGN_FULL}' USING ERRCODE = 'check_violation';
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE TRIGGER campaign_members_claim_seat BEFORE INSERT ON campaign_members
+        FOR EACH ROW EXECUTE FUNCTION campaign_members_claim_seat()
+        """,
+        """
+        CREATE OR REPLACE FUNCTION campaign_members_release_seat() RETURNS trigger AS $$
+        BEGIN
+            UPDATE campaign SET member_count = member_count - 1, updated_at = now() AT TIME ZONE 'utc'
+             WHERE id = OLD.campaign_id;
+            RETURN OLD;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        """
+        CREATE TRIGGER campaign_members_release_seat AFTER DELETE ON campaign_members
+        FOR EACH ROW EXECUTE FUNCTION campaign_members_release_seat()
+        """,
+    ],
+}
+
+for dialect, statements in SEAT_TRIGGERS.items():
+    for statement in statements:
+        event.listen(campaign_members, 'after_create', DDL(statement).execute_if(dialect=dialect))
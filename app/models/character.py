@@ -1,6 +1,70 @@
 from app import db
 from datetime import datetime
 from sqlalchemy import Index
+from sqlalchemy.ext.hybrid import Comparator, hybrid_property
+from sqlalchemy.orm import deferred
+import json
+import re
+
+ATTRIBUTES = ('agility', 'smarts', 'spirit', 'strength', 'vigor')
+_DIE = re.compile(r'd(4|6|8|10|12)(?:([+-])(\d+))?')
+
+def die_value(die):
+    """Encode a die type as a small integer: the die size plus its modifier.
+
+    'd8' is 8, 'd12+1' is 13 and 'd4-2' is 2, so the encoded values sort
+    and compare the way the dice do. Integers pass through unchanged.
+    """
+    if isinstance(die, int):
+        return die
+    match = _DIE.fullmatch(str(die).strip().lower())
+    if not match:
+        raise ValueError(f'Not a die type: {die!r}')
+    size, sign, modifier = int(match[1]), match[2], int(match[3] or 0)
+    # Only d12 steps up and only d4 steps down
+    if (sign == '+' and size != 12) or (sign == '-' and size != 4):
+        raise ValueError(f'Not a die type: {die!r}')
+    return size - modifier if sign == '-' else size + modifier
+
+def die_label(value):
+    """Decode die_value(): 8 is 'd8', 13 is 'd12+1', 2 is 'd4-2'."""
+    if value is None:
+        return None
+    if value > 12:
+        return f'd12+{value - 12}'
+    if value < 4:
+        return f'd4-{4 - value}'
+    return f'd{value}'
+
+class DieComparator(Comparator):
+    """Lets queries compare an encoded attribute with die types, e.g. Character.vigor >= 'd8'."""
+    
+    @staticmethod
+    def _encode(other):
+        if isinstance(other, (list, tuple, set)):
+            return [die_value(value) for value in other]
+        return die_value(other) if isinstance(other, str) else other
+    
+    def operate(self, op, *other, **kwargs):
+        return op(self.expression, *(self._encode(value) for value in other), **kwargs)
+    
+    def reverse_operate(self, op, other, **kwargs):
+        return op(self._encode(other), self.expression, **kwargs)
+
+def die_attribute(name):
+    """Hybrid exposing the integer column ``<name>_value`` as a die type string."""
+    column = f'{name}_value'
+    
+    def fget(self):
+        return die_label(getattr(self, column))
+    
+    def fset(self, die):
+        setattr(self, column, None if die is None else die_value(die))
+    
+    def comparator(cls):
+        return DieComparator(getattr(cls, column))
+    
+    return hybrid_property(fget, fset).comparator(comparator)
 
 class Character(db.Model):
     __tablename__ = 'character'
@@ -15,20 +79,27 @@ class Character(db.Model):
     character_concept = db.Column(db.String(100), nullable=False)
     rank = db.Column(db.String(20), default='Novice')
     
-    # Attributes (Savage Worlds uses die types)
-    agility = db.Column(db.String(3), default='d4')
-    smarts = db.Column(db.String(3), default='d4')
-    spirit = db.Column(db.String(3), default='d4')
-    strength = db.Column(db.String(3), default='d4')
-    vigor = db.Column(db.String(3), default='d4')
-    
-    # Character Details
-    hindrances = db.Column(db.Text)
-    edges = db.Column(db.Text)
-    equipment = db.Column(db.Text)
+    # Attributes (Savage Worlds uses die types), stored as die_value()
+    # integers and read and written as 'd8' strings through the hybrids below
+    agility_value = db.Column('agility', db.SmallInteger, default=4)
+    smarts_value = db.Column('smarts', db.SmallInteger, default=4)
+    spirit_value = db.Column('spirit', db.SmallInteger, default=4)
+    strength_value = db.Column('strength', db.SmallInteger, default=4)
+    vigor_value = db.Column('vigor', db.SmallInteger, default=4)
+    agility = die_attribute('agility')
+    smarts = die_attribute('smarts')
+    spirit = die_attribute('spirit')
+    strength = die_attribute('strength')
+    vigor = die_attribute('vigor')
+    
+    # Character Details; the Text fields are deferred as one group, loaded
+    # together on first access or up front with undefer_group('details')
+    hindrances = deferred(db.Column(db.Text), group='details')
+    edges = deferred(db.Column(db.Text), group='details')
+    equipment = deferred(db.Column(db.Text), group='details')
     money = db.Column(db.Integer, default=500)
-    background = db.Column(db.Text)
-    notes = db.Column(db.Text)
+    background = deferred(db.Column(db.Text), group='details')
+    notes = deferred(db.Column(db.Text), group='details')
     
     # Metadata
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -36,11 +107,58 @@ class Character(db.Model):
     
     # Relationships
     campaign = db.relationship('Campaign', back_populates='characters')
+    revisions = db.relationship('CharacterRevision', lazy='dynamic', cascade='all, delete-orphan',
+                                order_by='CharacterRevision.number')
     
     def __repr__(self):
         return f'<Character {self.name}>'
 
+# The fields character.edit writes, tracked by CharacterRevision
+REVISION_FIELDS = ('name', 'race', 'character_concept', 'rank', *ATTRIBUTES,
+                   'hindrances', 'edges', 'equipment', 'money', 'background', 'notes')
+# Revisions 1, 11, 21, ... are snapshots, so rebuilding any version reads at most this many rows
+SNAPSHOT_INTERVAL = 10
+
+class CharacterRevision(db.Model):
+    """One edit of a character: the fields it changed, and every so often the whole state.
+
+    ``changes`` holds only the new values of the fields the edit changed.
+    Snapshot revisions also keep every tracked field in ``snapshot``, so a
+    past version is rebuilt from the nearest snapshot and the deltas after it.
+    """
+    __tablename__ = 'character_revision'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    character_id = db.Column(db.Integer, db.ForeignKey('character.id', ondelete='CASCADE'), nullable=False)
+    number = db.Column(db.Integer, nullable=False)
+    changes = db.Column(db.Text, nullable=False)
+    # Only read when a version is rebuilt
+    snapshot = deferred(db.Column(db.Text))
+    edited_by = db.Column(db.Integer, db.ForeignKey('user.id'))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    editor = db.relationship('User')
+    
+    __table_args__ = (db.UniqueConstraint('character_id', 'number', name='uq_character_revision_number'),)
+    
+    @property
+    def is_snapshot(self):
+        return (self.number - 1) % SNAPSHOT_INTERVAL == 0
+    
+    @property
+    def changed_fields(self):
+        return sorted(json.loads(self.changes))
+    
+    def to_dict(self):
+        return {
+            'number': self.number,
+            'fields': self.changed_fields,
+            'snapshot': self.is_snapshot,
+            'edited_by': self.editor.username if self.editor else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None
+        }
+
 # Create indexes for frequently queried fields
-Index('idx_character_user_id', Character.user_id)
+Index('idx_character_user_id', Character.user_id, Character.created_at, Character.id)
 Index('idx_character_campaign_id', Character.campaign_id)
 Index('idx_character_name', Character.name)
@@ -1,4 +1,5 @@
 from app import db
+from datetime import datetime
 from sqlalchemy import Index
 
 class Item(db.Model):
@@ -51,10 +52,14 @@ class CharacterInventory(db.Model):
     item_id = db.Column(db.Integer, db.ForeignKey('item.id'), nullable=False)
     quantity = db.Column(db.Integer, default=1)
     equipped = db.Column(db.Boolean, default=False)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     
     # Relationship
     item = db.relationship('Item')
     
+    __mapper_args__ = {'version_id_col': version}
+    
     def to_dict(self):
         item_dict = self.item.to_dict()
         return {
@@ -1,6 +1,15 @@
 from app import db
 from datetime import datetime
-from sqlalchemy import Index
+from functools import cached_property
+from sqlalchemy import DDL, Index, event
+import codecs
+import json
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # optional: archives fall back to zlib
+    zstandard = None
 
 class CampaignNote(db.Model):
     __tablename__ = 'campaign_note'
@@ -11,11 +20,15 @@ class CampaignNote(db.Model):
     content = db.Column(db.Text, nullable=False)
     note_type = db.Column(db.String(50))  # e.g., 'session_summary', 'plot_hook', 'npc_note'
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    version = db.Column(db.Integer, nullable=False, default=1, server_default='1')
     created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
     
     # Relationships
     author = db.relationship('User', foreign_keys=[created_by])
     
+    __mapper_args__ = {'version_id_col': version}
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -27,7 +40,149 @@ class CampaignNote(db.Model):
             'author': self.author.username
         }
 
+# Columns kept for each archived note
+ARCHIVED_NOTE_FIELDS = ('id', 'title', 'content', 'note_type', 'created_at', 'updated_at', 'version', 'created_by')
+ARCHIVE_CODEC = 'zstd' if zstandard else 'zlib'
+# Decompressed bytes parsed at a time when streaming an archive
+ARCHIVE_READ_SIZE = 64 * 1024
+
+def compress_notes(notes):
+    """Pack note dicts into (codec, blob, uncompressed size)."""
+    raw = json.dumps([[note[field] for field in ARCHIVED_NOTE_FIELDS] for note in notes],
+                     default=lambda value: value.isoformat(), separators=(',', ':')).encode()
+    if ARCHIVE_CODEC == 'zstd':
+        return 'zstd', zstandard.ZstdCompressor(level=19).compress(raw), len(raw)
+    return 'zlib', zlib.compress(raw, 9), len(raw)
+
+def _decompressed(codec, blob, size):
+    """The archive's JSON, as byte chunks of at most about ``size``."""
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('This archive was written with zstd; install the zstandard package to read it')
+        reader = zstandard.ZstdDecompressor().stream_reader(blob)
+        while chunk := reader.read(size):
+            yield chunk
+        return
+    decompressor = zlib.decompressobj()
+    while blob:
+        yield decompressor.decompress(blob, size)
+        blob = decompressor.unconsumed_tail
+    yield decompressor.flush()
+
+def iter_notes(codec, blob, size=ARCHIVE_READ_SIZE):
+    """Unpack an archive blob into note dicts, oldest first, one note at a time.
+
+    Decompresses and parses ``size`` bytes at a time, so memory use stays
+    flat however many notes the archive holds.
+    """
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder('utf-8')()
+    buffer, position, opened = '', 0, False
+    for chunk in _decompressed(codec, blob, size):
+        buffer, position = buffer[position:] + text.decode(chunk), 0
+        if not opened and buffer:
+            # Step past the bracket that opens the list of notes
+            position, opened = 1, True
+        while True:
+            while position < len(buffer) and buffer[position] in ',]':
+                position += 1
+            try:
+                values, position = decoder.raw_decode(buffer, position)
+            except ValueError:
+                # The rest of this note is in the next chunk
+                break
+            note = dict(zip(ARCHIVED_NOTE_FIELDS, values))
+            for field in ('created_at', 'updated_at'):
+                if note[field]:
+                    note[field] = datetime.fromisoformat(note[field])
+            yield note
+    if buffer[position:].strip(',]'):
+        raise ValueError('Archive ends part way through a note')
+
+def decompress_notes(codec, blob):
+    """Unpack an archive blob into note dicts, oldest first."""
+    return list(iter_notes(codec, blob))
+
+class CampaignNoteArchive(db.Model):
+    """Notes of a finished campaign, moved out of campaign_note into one compressed blob."""
+    __tablename__ = 'campaign_note_archive'
+    
+    campaign_id = db.Column(db.Integer, db.ForeignKey('campaign.id', ondelete='CASCADE'), primary_key=True)
+    codec = db.Column(db.String(10), nullable=False)
+    note_count = db.Column(db.Integer, nullable=False)
+    raw_size = db.Column(db.Integer, nullable=False)
+    # Only read when the notes are
+    payload = db.deferred(db.Column(db.LargeBinary, nullable=False))
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    @cached_property
+    def notes(self):
+        """The archived notes as dicts, oldest first, decompressed on first access."""
+        return decompress_notes(self.codec, self.payload)
+    
+    def store(self, notes):
+        self.codec, self.payload, self.raw_size = compress_notes(notes)
+        self.note_count = len(notes)
+        self.archived_at = datetime.utcnow()
+        self.__dict__.pop('notes', None)
+
 # Create indexes for frequently queried fields
 Index('idx_note_campaign', CampaignNote.campaign_id)
 Index('idx_note_author', CampaignNote.created_by)
 Index('idx_note_type', CampaignNote.note_type)
+
+# Full-text search over title and content (see app/campaign/search.py).
+# SQLite keeps an external-content FTS5 table in step with triggers; Postgres
+# uses a generated tsvector column, title weighted above content, with a GIN
+# index.
+NOTE_SEARCH_DDL = {
+    'sqlite': [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS campaign_note_fts USING fts5(
+            title, content, content='campaign_note', content_rowid='id', tokenize='porter unicode61'
+        )
+        """,
+        """
+        CREATE TRIGGER campaign_note_fts_insert AFTER INSERT ON campaign_note
+        BEGIN
+            INSERT INTO campaign_note_fts(rowid, title, content) VALUES (NEW.id, NEW.title, NEW.content);
+        END
+        """,
+        """
+        CREATE TRIGGER campaign_note_fts_delete AFTER DELETE ON campaign_note
+        BEGIN
+            INSERT INTO campaign_note_fts(campaign_note_fts, rowid, title, content)
+            VALUES ('delete', OLD.id, OLD.title, OLD.content);
+        END
+        """,
+        """
+        CREATE TRIGGER campaign_note_fts_update AFTER UPDATE OF title, content ON campaign_note
+        BEGIN
+            INSERT INTO campaign_note_fts(campaign_note_fts, rowid, title, content)
+            VALUES ('delete', OLD.id, OLD.title, OLD.content);
+            INSERT INTO campaign_note_fts(rowid, title, content) VALUES (NEW.id, NEW.title, NEW.content);
+        END
+        """,
+    ],
+    'postgresql': [
+        """
+        ALTER TABLE campaign_note ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(content, '')), 'B')
+        ) STORED
+        """,
+        'CREATE INDEX idx_note_search ON campaign_note USING GIN (search_vector)',
+    ],
+}
+# What the DDL above creates outside the model, for migrations/env.py to
+# leave out of autogenerate; FTS5 adds shadow tables named after its table.
+NOTE_SEARCH_TABLES = ('campaign_note_fts',) + tuple(
+    f'campaign_note_fts_{shadow}' for shadow in ('data', 'idx', 'docsize', 'config'))
+NOTE_SEARCH_COLUMNS = {('campaign_note', 'search_vector')}
+NOTE_SEARCH_INDEXES = {('campaign_note', 'idx_note_search')}
+
+for dialect, statements in NOTE_SEARCH_DDL.items():
+    for statement in statements:
+        event.listen(CampaignNote.__table__, 'after_create', DDL(statement).execute_if(dialect=dialect))
+event.listen(CampaignNote.__table__, 'after_drop',
+             DDL('DROP TABLE IF EXISTS campaign_note_fts').execute_if(dialect='sqlite'))
@@ -10,6 +10,8 @@ class User(db.Model, UserMixin):
     username = db.Column(db.String(100), unique=True, nullable=False)
     email = db.Column(db.String(150), unique=True, nullable=False)
     password = db.Column(db.String(200), nullable=False)
+    # Signed into calendar feed tokens; bumping it revokes every token issued so far
+    feed_generation = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     
     # Relationships
     characters = db.relationship('Character', backref='user', lazy='dynamic')
@@ -0,0 +1,162 @@
+import os
+import threading
+import time
+import weakref
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Named pool profiles, selected with DB_POOL_PROFILE. Individual settings can
+# still be overridden with the DB_POOL_* environment variables below.
+POOL_PROFILES = {
+    # Many gunicorn sync workers sharing one Postgres
+    'small': {
+        'pool_size': 2,
+        'max_overflow': 2,
+        'pool_timeout': 10,
+        'pool_recycle': 1800,
+    },
+    'default': {
+        'pool_size': 5,
+        'max_overflow': 10,
+        'pool_timeout': 30,
+        'pool_recycle': 1800,
+    },
+    # Few threaded (gthread/gevent) workers, each serving many requests at once
+    'large': {
+        'pool_size': 20,
+        'max_overflow': 20,
+        'pool_timeout': 30,
+        'pool_recycle': 1800,
+    },
+}
+
+POOL_ENV_OVERRIDES = {
+    'DB_POOL_SIZE': ('pool_size', int),
+    'DB_MAX_OVERFLOW': ('max_overflow', int),
+    'DB_POOL_TIMEOUT': ('pool_timeout', float),
+    'DB_POOL_RECYCLE': ('pool_recycle', int),
+    'DB_POOL_PRE_PING': ('pool_pre_ping', lambda value: value.lower() in ('1', 'true', 'yes', 'on')),
+}
+
+
+class PoolStats:
+    """Counters describing how long requests wait for a pooled connection."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait, timed_out=False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+    def to_dict(self):
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                'checkouts': self.checkouts,
+                'timeouts': self.timeouts,
+                'wait_total_ms': round(self.total_wait * 1000, 3),
+                'wait_avg_ms': round(self.total_wait * 1000 / attempts, 3) if attempts else 0.0,
+                'wait_max_ms': round(self.max_wait * 1000, 3),
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records how long each checkout waited for a connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - start)
+        return connection
+
+
+def build_engine_options(database_uri, profile=None, environ=None):
+    """Return SQLALCHEMY_ENGINE_OPTIONS for the given database URI.
+
+    The profile defaults to DB_POOL_PROFILE (or 'default'). SQLite in-memory
+    databases are left to Flask-SQLAlchemy, which uses a StaticPool for them.
+    """
+    environ = os.environ if environ is None else environ
+    profile = profile or environ.get('DB_POOL_PROFILE', 'default')
+    if profile not in POOL_PROFILES:
+        raise ValueError(f'Unknown DB_POOL_PROFILE {profile!r}; '
+                         f'expected one of {", ".join(sorted(POOL_PROFILES))}')
+
+    url = make_url(database_uri)
+    is_sqlite = url.get_backend_name() == 'sqlite'
+    if is_sqlite and url.database in (None, '', ':memory:'):
+        return {}
+
+    options = dict(POOL_PROFILES[profile])
+    # A pre-ping is a round trip per checkout; it only pays off for server
+    # databases that can drop idle connections behind our back.
+    options['pool_pre_ping'] = not is_sqlite
+    for env_name, (option, convert) in POOL_ENV_OVERRIDES.items():
+        if environ.get(env_name):
+            options[option] = convert(environ[env_name])
+
+    options['poolclass'] = InstrumentedQueuePool
+    return options
+
+
+def pool_status(engine):
+    """Return a JSON-serialisable snapshot of an engine's connection pool."""
+    pool = engine.pool
+    status = {
+        'backend': engine.url.get_backend_name(),
+        'pool_class': type(pool).__name__,
+    }
+    if isinstance(pool, QueuePool):
+        status.update({
+            'size': pool.size(),
+            'checked_out': pool.checkedout(),
+            'checked_in': pool.checkedin(),
+            'overflow': max(pool.overflow(), 0),
+            'max_overflow': pool._max_overflow,
+            'timeout': pool.timeout(),
+        })
+    stats = getattr(pool, 'stats', None)
+    if stats is not None:
+        status.update(stats.to_dict())
+    return status
+
+
+# Engines created in this process. After a fork the child must not reuse the
+# parent's sockets, so every engine drops its pool without closing them.
+_engines = weakref.WeakSet()
+_fork_hook_registered = False
+
+
+def dispose_engines():
+    """Replace every known engine's pool, leaving inherited connections to the parent."""
+    for engine in list(_engines):
+        engine.dispose(close=False)
+
+
+def register_engines(engines):
+    """Track engines so they are disposed of in forked child processes."""
+    global _fork_hook_registered
+    _engines.update(engines)
+    if not _fork_hook_registered and hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=dispose_engines)
+        _fork_hook_registered = True
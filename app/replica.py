@@ -0,0 +1,81 @@
+import random
+import time
+from functools import wraps
+
+from flask import g, has_app_context, has_request_context, request, session, current_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+SAFE_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS'))
+
+# Flask session key holding the time until which this client reads from the primary
+PRIMARY_UNTIL_KEY = '_db_primary_until'
+
+
+def _reads_from_replica():
+    """Decide whether reads in the current request may go to a replica."""
+    if not has_request_context() or request.method not in SAFE_METHODS:
+        return False
+    if not current_app.config.get('DB_REPLICA_BINDS'):
+        return False
+    if g.get('_db_use_primary') or g.get('_db_wrote'):
+        return False
+    # Read-after-write: stay on the primary until replicas have caught up
+    return session.get(PRIMARY_UNTIL_KEY, 0) <= time.time()
+
+
+def _mark_write():
+    if has_app_context():
+        g._db_wrote = True
+
+
+class RoutingSession(Session):
+    """Session that sends reads from safe-method requests to a read replica.
+
+    Writes, flushes and every statement outside a GET/HEAD/OPTIONS request use
+    the primary, as do requests made shortly after the same client committed.
+    One replica is picked per request so its reads see a consistent snapshot.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        engine = super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+        if bind is not None or engine is not self._db.engines.get(None):
+            return engine
+
+        if self._flushing or getattr(clause, 'is_dml', False):
+            _mark_write()
+            return engine
+
+        if _reads_from_replica():
+            replica_key = g.get('_db_replica')
+            if replica_key is None:
+                replica_key = g._db_replica = random.choice(current_app.config['DB_REPLICA_BINDS'])
+            return self._db.engines[replica_key]
+        return engine
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _after_flush(session, flush_context):
+    _mark_write()
+
+
+def use_primary(f):
+    """Route every query in the decorated view to the primary database."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g._db_use_primary = True
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def _stick_to_primary(response):
+    if g.get('_db_wrote'):
+        window = current_app.config['DB_REPLICA_STICKY_SECONDS']
+        session[PRIMARY_UNTIL_KEY] = time.time() + window
+    return response
+
+
+def init_replica_routing(app):
+    """Enable primary stickiness for clients that wrote during a request."""
+    if app.config.get('DB_REPLICA_BINDS'):
+        app.after_request(_stick_to_primary)
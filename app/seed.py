@@ -0,0 +1,320 @@
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import islice
+
+from sqlalchemy import func, insert, select, text
+from werkzeug.security import generate_password_hash
+
+from app.models import (User, Character, Campaign, CampaignRace, CampaignEdge, campaign_members, Item,
+                        CharacterInventory, Map, CampaignNote)
+
+# Row counts at scale 1.0, roughly a busy production install
+DEFAULT_VOLUMES = {
+    'users': 50000,
+    'campaigns': 5000,
+    'characters': 200000,
+    'items': 10000,
+    'inventory': 2000000,
+    'notes': 100000,
+    'maps': 10000,
+}
+
+SEED_PASSWORD = 'password'
+
+# Savage Worlds distributions: (value, weight)
+RACES = [('Human', 40), ('Elf', 12), ('Dwarf', 12), ('Half-Elf', 8), ('Half-Folk', 7),
+         ('Rakashan', 6), ('Saurian', 5), ('Avion', 4), ('Aquarian', 3), ('Android', 3)]
+EDGES = ['Alertness', 'Ambidextrous', 'Arcane Background', 'Brawny', 'Brave', 'Fleet-Footed',
+         'Level Headed', 'Luck', 'Nerves of Steel', 'Quick', 'Strong Willed', 'Trademark Weapon']
+RANKS = [('Novice', 45), ('Seasoned', 30), ('Veteran', 15), ('Heroic', 7), ('Legendary', 3)]
+# Attributes are written in their die_value() encoding: d4 is 4, d12 is 12
+DIE_TYPES = [(4, 20), (6, 40), (8, 27), (10, 10), (12, 3)]
+CONCEPTS = ['Gunslinger', 'Mad Scientist', 'Occultist', 'Brawler', 'Bard', 'Scout', 'Knight',
+            'Thief', 'Priest', 'Pilot', 'Detective', 'Huckster', 'Soldier', 'Noble', 'Ranger']
+SETTINGS = ['Deadlands', 'Rippers', 'Pirates of the Spanish Main', 'Flash Gordon', 'Rifts',
+            'East Texas University', 'Weird Wars', 'Sundered Skies', 'Homebrew Fantasy', None]
+CAMPAIGN_STATUSES = [('active', 60), ('draft', 15), ('completed', 15), ('archived', 10)]
+NOTE_TYPES = [('general', 35), ('quest', 20), ('npc', 20), ('location', 15), ('lore', 10)]
+MAP_TYPES = [('battle', 60), ('dungeon', 20), ('world', 10), ('city', 10)]
+ITEM_TYPES = [('weapon', 35), ('armor', 15), ('gear', 40), ('consumable', 10)]
+WEAPON_DAMAGE = ['Str+d4', 'Str+d6', 'Str+d8', 'Str+d10', '2d6', '2d8', '2d6+1', '3d6']
+WORDS = ('the party ventured into ancient ruins where a cult of shadow priests guarded a relic '
+         'wild card extras ambushed the posse at dawn raises were rolled and bennies spent '
+         'the marshal revealed a hidden map of the frontier town with a mysterious stranger').split()
+
+
+def _weighted(rng, table, k):
+    values, weights = zip(*table)
+    return rng.choices(values, weights=weights, k=k)
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _next_id(connection, table):
+    return (connection.execute(select(func.max(table.c.id))).scalar() or 0) + 1
+
+
+def _sync_sequences(connection, tables):
+    """Move Postgres id sequences past rows that were inserted with explicit ids."""
+    quote = connection.dialect.identifier_preparer.quote
+    for table in tables:
+        name = quote(table.name)
+        connection.execute(text(f"SELECT setval(pg_get_serial_sequence('{name}', 'id'), max(id)) FROM {name}"))
+
+
+def _random_datetime(rng, now, days_back):
+    return now - timedelta(seconds=rng.randrange(days_back * 86400))
+
+
+def _paragraph(rng, min_words, max_words):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(min_words, max_words))).capitalize() + '.'
+
+
+def _paragraphs(rng, min_words, max_words, count=512):
+    """Pre-generate text to pick from; building fresh prose per row dominates seeding time."""
+    return [_paragraph(rng, min_words, max_words) for _ in range(count)]
+
+
+def _users(rng, start, count, password_hash):
+    for user_id in range(start, start + count):
+        yield {
+            'id': user_id,
+            'username': f'seed_user_{user_id}',
+            'email': f'seed_user_{user_id}@example.com',
+            'password': password_hash,
+        }
+
+
+def _campaigns(rng, start, count, user_ids, now):
+    statuses = _weighted(rng, CAMPAIGN_STATUSES, count)
+    levels = _weighted(rng, RANKS, count)
+    for offset in range(count):
+        status = statuses[offset]
+        yield {
+            'id': start + offset,
+            'owner_id': rng.choice(user_ids),
+            'name': f'{rng.choice(CONCEPTS)}s of {rng.choice(SETTINGS) or "the Frontier"} #{start + offset}',
+            'description': _paragraph(rng, 10, 40)[:500],
+            'setting': rng.choice(SETTINGS),
+            'power_level': levels[offset],
+            'status': status,
+            'created_at': _random_datetime(rng, now, 730),
+            'next_session': now + timedelta(hours=rng.randrange(1, 24 * 30)) if status == 'active' else None,
+        }
+
+
+def _rules(rng, campaign_ids, column, values, share, low, high):
+    """Restrict ``share`` of the campaigns to a handful of ``values``."""
+    for campaign_id in campaign_ids:
+        if rng.random() < share:
+            for value in rng.sample(values, rng.randint(low, high)):
+                yield {'campaign_id': campaign_id, column: value}
+
+
+def _items(rng, start, count):
+    types = _weighted(rng, ITEM_TYPES, count)
+    for offset in range(count):
+        item_type = types[offset]
+        yield {
+            'id': start + offset,
+            'name': f'{item_type.title()} {start + offset}',
+            'weight': round(rng.uniform(0.1, 30), 1),
+            'item_type': item_type,
+            'damage': rng.choice(WEAPON_DAMAGE) if item_type == 'weapon' else None,
+            'armor': rng.randint(1, 4) if item_type == 'armor' else None,
+            'cost': rng.randint(1, 1000),
+        }
+
+
+def _characters(rng, start, count, user_ids, memberships, now):
+    races = _weighted(rng, RACES, count)
+    ranks = _weighted(rng, RANKS, count)
+    dice = _weighted(rng, DIE_TYPES, count * 5)
+    backgrounds = _paragraphs(rng, 20, 80)
+    notes = _paragraphs(rng, 0, 30)
+    for offset in range(count):
+        # Most characters are played in one of their owner's campaigns
+        if memberships and rng.random() < 0.6:
+            campaign_id, user_id = rng.choice(memberships)
+        else:
+            campaign_id, user_id = None, rng.choice(user_ids)
+        created_at = _random_datetime(rng, now, 730)
+        agility, smarts, spirit, strength, vigor = dice[offset * 5:offset * 5 + 5]
+        yield {
+            'id': start + offset,
+            'user_id': user_id,
+            'campaign_id': campaign_id,
+            'name': f'{rng.choice(CONCEPTS)} {start + offset}',
+            'race': races[offset],
+            'character_concept': rng.choice(CONCEPTS),
+            'rank': ranks[offset],
+            'agility': agility,
+            'smarts': smarts,
+            'spirit': spirit,
+            'strength': strength,
+            'vigor': vigor,
+            'hindrances': 'Loyal, Heroic, Curious',
+            'edges': 'Alertness, Brawny',
+            'equipment': 'Backpack, bedroll, rope',
+            'money': rng.randint(0, 2000),
+            'background': rng.choice(backgrounds),
+            'notes': rng.choice(notes),
+            'created_at': created_at,
+            'updated_at': created_at,
+        }
+
+
+def _inventory(rng, start, count, character_ids, item_ids):
+    # A few items (rope, rations) are in nearly every inventory
+    popular = item_ids[:max(1, len(item_ids) // 50)]
+    # Rows are generated character by character, so the character index is
+    # appended to in order instead of being updated at random
+    average = count / len(character_ids)
+    offset = 0
+    for character_id in character_ids:
+        for _ in range(min(int(rng.expovariate(1 / average) + 0.5) if average else 0, count - offset)):
+            pool = popular if rng.random() < 0.5 else item_ids
+            yield {
+                'id': start + offset,
+                'character_id': character_id,
+                'item_id': rng.choice(pool),
+                'quantity': rng.choice((1, 1, 1, 2, 3, 5, 10)),
+                'equipped': rng.random() < 0.3,
+            }
+            offset += 1
+    # Top up whatever the random per-character counts fell short of
+    while offset < count:
+        yield {
+            'id': start + offset,
+            'character_id': rng.choice(character_ids),
+            'item_id': rng.choice(item_ids),
+            'quantity': 1,
+            'equipped': False,
+        }
+        offset += 1
+
+
+def _notes(rng, start, count, memberships, now):
+    types = _weighted(rng, NOTE_TYPES, count)
+    contents = _paragraphs(rng, 30, 300, count=2048)
+    for offset in range(count):
+        campaign_id, user_id = rng.choice(memberships)
+        yield {
+            'id': start + offset,
+            'campaign_id': campaign_id,
+            'title': f'Session {offset + 1}: {rng.choice(WORDS).title()} {rng.choice(WORDS)}',
+            'content': rng.choice(contents),
+            'note_type': types[offset],
+            'created_at': _random_datetime(rng, now, 730),
+            'created_by': user_id,
+        }
+
+
+def _maps(rng, start, count, campaigns, now):
+    types = _weighted(rng, MAP_TYPES, count)
+    for offset in range(count):
+        campaign_id, owner_id = rng.choice(campaigns)
+        yield {
+            'id': start + offset,
+            'name': f'{types[offset].title()} map {start + offset}',
+            'map_type': types[offset],
+            'grid_width': rng.choice((20, 30, 40, 50)),
+            'grid_height': rng.choice((20, 30, 40, 50)),
+            'background_color': f'#{rng.randrange(0x1000000):06x}',
+            'show_grid': rng.random() < 0.9,
+            'created_at': _random_datetime(rng, now, 730),
+            'created_by': owner_id,
+            'campaign_id': campaign_id,
+        }
+
+
+def seed_database(engine, volumes, seed=42, chunk_size=10000, echo=print):
+    """Bulk insert synthetic data with Core executemany batches.
+
+    Rows are generated lazily and written ``chunk_size`` at a time, with
+    explicit primary keys continuing after any existing rows, so the ORM and
+    per-row RETURNING are never involved; on Postgres the id sequences are
+    then moved past them. Returns the seconds spent per table.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    password_hash = generate_password_hash(SEED_PASSWORD)
+    timings = {}
+
+    with engine.begin() as connection:
+        if connection.dialect.name == 'sqlite':
+            # Durability is irrelevant for throwaway load-test data, and a large
+            # page cache keeps index maintenance for millions of rows in memory
+            connection.execute(text('PRAGMA synchronous = OFF'))
+            connection.execute(text('PRAGMA cache_size = -262144'))
+
+        def bulk_insert(name, table, rows):
+            started = time.perf_counter()
+            written = 0
+            for chunk in _chunks(rows, chunk_size):
+                connection.execute(insert(table), chunk)
+                written += len(chunk)
+            timings[name] = time.perf_counter() - started
+            echo(f'{name:<12} {written:>10} rows in {timings[name]:6.2f}s')
+
+        user_start = _next_id(connection, User.__table__)
+        bulk_insert('users', User.__table__, _users(rng, user_start, volumes['users'], password_hash))
+        user_ids = list(range(user_start, user_start + volumes['users']))
+        if not user_ids:
+            return timings
+
+        campaign_start = _next_id(connection, Campaign.__table__)
+        campaign_rows = list(_campaigns(rng, campaign_start, volumes['campaigns'], user_ids, now))
+        campaigns = [(row['id'], row['owner_id']) for row in campaign_rows]
+
+        # Owner plus two to six players per campaign; some tables still have
+        # open seats. member_count is filled in by the campaign_members triggers.
+        memberships = []
+        for row in campaign_rows:
+            members = {row['owner_id'], *rng.sample(user_ids, min(len(user_ids), rng.randint(2, 6)))}
+            row['max_players'] = max(len(members), rng.choice((4, 5, 6, 6, 7, 8)))
+            memberships.extend((row['id'], user_id) for user_id in members)
+        bulk_insert('campaigns', Campaign.__table__, campaign_rows)
+        del campaign_rows
+        bulk_insert('members', campaign_members,
+                    ({'campaign_id': campaign_id, 'user_id': user_id} for campaign_id, user_id in memberships))
+        campaign_ids = [campaign_id for campaign_id, _ in campaigns]
+        bulk_insert('races', CampaignRace.__table__,
+                    _rules(rng, campaign_ids, 'race', [race for race, _ in RACES], 0.4, 3, 6))
+        bulk_insert('edges', CampaignEdge.__table__, _rules(rng, campaign_ids, 'edge', EDGES, 0.25, 4, 8))
+
+        item_start = _next_id(connection, Item.__table__)
+        bulk_insert('items', Item.__table__, _items(rng, item_start, volumes['items']))
+        item_ids = list(range(item_start, item_start + volumes['items']))
+
+        character_start = _next_id(connection, Character.__table__)
+        bulk_insert('characters', Character.__table__,
+                    _characters(rng, character_start, volumes['characters'], user_ids, memberships, now))
+        character_ids = list(range(character_start, character_start + volumes['characters']))
+
+        if character_ids and item_ids:
+            bulk_insert('inventory', CharacterInventory.__table__,
+                        _inventory(rng, _next_id(connection, CharacterInventory.__table__),
+                                   volumes['inventory'], character_ids, item_ids))
+        if memberships:
+            bulk_insert('notes', CampaignNote.__table__,
+                        _notes(rng, _next_id(connection, CampaignNote.__table__), volumes['notes'], memberships, now))
+        if campaigns:
+            bulk_insert('maps', Map.__table__,
+                        _maps(rng, _next_id(connection, Map.__table__), volumes['maps'], campaigns, now))
+
+        if connection.dialect.name == 'postgresql':
+            # Explicit ids never advance the serial sequences, so the next ORM
+            # insert would reuse a seeded id
+            _sync_sequences(connection, [table.__table__ for table in (
+                User, Campaign, Item, Character, CharacterInventory, CampaignNote, Map)])
+
+    return timings
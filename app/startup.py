@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError
+
+SCHEMA_CACHE_FILE = 'schema_fingerprint.json'
+
+
+class StartupProfile:
+    """Wall-clock time spent in each phase of create_app()."""
+
+    def __init__(self):
+        self.phases = []
+        self._last = time.perf_counter()
+
+    def mark(self, name):
+        """Record the time elapsed since the previous mark under ``name``."""
+        now = time.perf_counter()
+        self.phases.append((name, now - self._last))
+        self._last = now
+
+    @property
+    def total(self):
+        return sum(seconds for _, seconds in self.phases)
+
+    def to_dict(self):
+        return {name: round(seconds * 1000, 3) for name, seconds in self.phases}
+
+
+def migrations_directory(app):
+    return os.path.join(os.path.dirname(app.root_path), 'migrations')
+
+
+def _schema_cache_path(app):
+    return os.path.join(app.instance_path, SCHEMA_CACHE_FILE)
+
+
+def schema_fingerprint(app):
+    """Hash the migration scripts on disk together with the database URL.
+
+    Only file names, sizes and modification times are read, so computing the
+    fingerprint never touches the database or imports Alembic.
+    """
+    digest = hashlib.sha1(app.config['SQLALCHEMY_DATABASE_URI'].encode())
+    versions = os.path.join(migrations_directory(app), 'versions')
+    if os.path.isdir(versions):
+        for entry in sorted(os.scandir(versions), key=lambda e: e.name):
+            if entry.name.endswith('.py'):
+                stat = entry.stat()
+                digest.update(f'{entry.name}:{stat.st_size}:{stat.st_mtime_ns}'.encode())
+    return digest.hexdigest()
+
+
+def clear_schema_cache(app):
+    try:
+        os.remove(_schema_cache_path(app))
+    except FileNotFoundError:
+        pass
+
+
+def _read_schema_cache(app):
+    try:
+        with open(_schema_cache_path(app)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _script_directory(app):
+    from alembic.config import Config
+    from alembic.script import ScriptDirectory
+
+    config = Config()
+    config.set_main_option('script_location', migrations_directory(app))
+    return ScriptDirectory.from_config(config)
+
+
+def _database_revisions(engine):
+    try:
+        with engine.connect() as connection:
+            return {row[0] for row in connection.execute(text('SELECT version_num FROM alembic_version'))}
+    except DBAPIError:
+        return set()
+
+
+def check_schema(app, engine):
+    """Compare the database revision with the Alembic head without reflecting tables.
+
+    The result is cached in the instance folder under a fingerprint of the
+    migration scripts, so once a database has been verified later boots
+    neither query it nor load Alembic. Returns 'cached', 'current' or
+    'outdated'. Raises RuntimeError when the database was never migrated or
+    is behind the head, since every request would fail; a revision newer
+    than these scripts (code older than the database, e.g. mid-deploy) is
+    only logged.
+    """
+    fingerprint = schema_fingerprint(app)
+    if _read_schema_cache(app).get('fingerprint') == fingerprint:
+        return 'cached'
+
+    script = _script_directory(app)
+    heads = set(script.get_heads())
+    revisions = _database_revisions(engine)
+    if revisions != heads:
+        message = (f'Database schema is at revision {", ".join(sorted(revisions)) or "none"} but the '
+                   f'migrations head is {", ".join(sorted(heads))}; run `flask db upgrade` '
+                   f'(or `flask init-db` for a new database).')
+        known = {revision.revision for revision in script.walk_revisions()}
+        if revisions <= known:
+            raise RuntimeError(message)
+        app.logger.warning(message)
+        return 'outdated'
+
+    os.makedirs(app.instance_path, exist_ok=True)
+    with open(_schema_cache_path(app), 'w') as f:
+        json.dump({'fingerprint': fingerprint, 'revisions': sorted(heads)}, f)
+    return 'current'
+
+
+# Run in a fresh interpreter so module imports are measured cold.
+_PROFILE_SCRIPT = '''
+import json, time
+start = time.perf_counter()
+from app import create_app
+imported = time.perf_counter()
+app = create_app()
+print(json.dumps({
+    'import_ms': round((imported - start) * 1000, 3),
+    'phases': app.extensions['startup_profile'].to_dict(),
+}))
+'''
+
+
+def _parse_importtime(stderr):
+    """Sum the self time reported by -X importtime per top-level package, in ms."""
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0) + int(self_us) / 1000
+    return packages
+
+
+def profile_startup(app):
+    """Boot the application in a subprocess and report per-phase startup timings."""
+    project_root = os.path.dirname(app.root_path)
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', _PROFILE_SCRIPT],
+        cwd=project_root, capture_output=True, text=True, check=True,
+    )
+    report = json.loads(result.stdout.strip().splitlines()[-1])
+    report['imports'] = _parse_importtime(result.stderr)
+    return report
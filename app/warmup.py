@@ -0,0 +1,63 @@
+import logging
+import time
+
+from jinja2 import TemplateError
+from sqlalchemy import text
+from sqlalchemy.orm import configure_mappers
+
+logger = logging.getLogger(__name__)
+
+
+def compile_templates(app):
+    """Load and compile every template into the Jinja environment's cache."""
+    compiled = 0
+    for name in app.jinja_env.list_templates(extensions=['html']):
+        try:
+            app.jinja_env.get_template(name)
+            compiled += 1
+        except TemplateError as e:
+            logger.warning(f'Warmup could not compile template {name}: {e}')
+    return compiled
+
+
+def render_pages(app, paths):
+    """Render pages through the test client so views, forms and filters are primed."""
+    client = app.test_client()
+    for path in paths:
+        response = client.get(path)
+        if response.status_code >= 500:
+            logger.warning(f'Warmup request to {path} returned {response.status_code}')
+
+
+def prime_pool(app):
+    """Open one pooled connection per engine so the first request does not connect."""
+    from app import db
+    with app.app_context():
+        for engine in db.engines.values():
+            with engine.connect() as connection:
+                connection.execute(text('SELECT 1'))
+
+
+def warm_up(app, connect=True):
+    """Prepare an application before it serves traffic.
+
+    Called once in the gunicorn master when the app is preloaded (so compiled
+    templates and configured mappers are shared copy-on-write by every
+    worker, which then only need warm_up_worker), or in each worker when it
+    is not. Pass ``connect=False`` in processes that are about to fork.
+    """
+    start = time.perf_counter()
+    configure_mappers()
+    app.url_map.update()
+    templates = compile_templates(app)
+    render_pages(app, app.config.get('WARMUP_PATHS', ()))
+    if connect:
+        prime_pool(app)
+    logger.info(f'Warmed up {templates} templates in {(time.perf_counter() - start) * 1000:.1f} ms')
+
+
+def warm_up_worker(app):
+    """Open the database connections of a worker forked from a warmed-up master."""
+    start = time.perf_counter()
+    prime_pool(app)
+    logger.info(f'Connected worker in {(time.perf_counter() - start) * 1000:.1f} ms')
@@ -0,0 +1,102 @@
+"""Measure bulk character import and export throughput.
+
+Usage:
+    python benchmarks/character_import.py [--rows 20000] [--format ndjson]
+
+Imports --rows generated characters through POST /character/import into a
+fresh SQLite database, then streams them back out through
+GET /character/export. Prints rows per second for both; the run fails if
+the import is slower than --min-rate rows per second, or if a body that
+wraps the rows in an object is not rejected as malformed.
+"""
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ROW = {'race': 'Human', 'character_concept': 'Gunslinger', 'rank': 'Novice', 'agility': 'd8',
+       'smarts': 'd6', 'spirit': 'd6', 'strength': 'd6', 'vigor': 'd8', 'hindrances': 'Loyal, Heroic',
+       'edges': 'Quick', 'equipment': 'Colt Peacemaker, bedroll', 'money': 500,
+       'background': 'Rode in from the frontier. ' * 8, 'notes': ''}
+
+
+def boot_app(database_url):
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['RATELIMIT_ENABLED'] = 'false'
+    os.environ['SCHEMA_CHECK'] = 'false'
+    os.environ['SQL_INSTRUMENTATION'] = 'false'
+    os.environ['CACHE_TYPE'] = 'NullCache'
+    sys.path.insert(0, PROJECT_ROOT)
+
+    from app import create_app, db
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def make_body(rows, body_format):
+    characters = ({**ROW, 'name': f'Import {number}'} for number in range(rows))
+    if body_format == 'csv':
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=['name', *ROW])
+        writer.writeheader()
+        writer.writerows(characters)
+        return out.getvalue().encode(), 'text/csv'
+    return ''.join(json.dumps(character) + '\n' for character in characters).encode(), 'application/x-ndjson'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--format', default='ndjson', choices=('ndjson', 'csv'))
+    parser.add_argument('--min-rate', type=float, default=2000, help='Slowest acceptable import rate (rows/s)')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = boot_app(f'sqlite:///{tmp}/import.db')
+        from app import db
+        from app.models import User
+        from app.seed import SEED_PASSWORD
+        with app.app_context():
+            user = User(username='importer', email='importer@example.com')
+            user.set_password(SEED_PASSWORD)
+            db.session.add(user)
+            db.session.commit()
+        client = app.test_client()
+        client.post('/login', data={'username': 'importer', 'password': SEED_PASSWORD})
+
+        body, content_type = make_body(args.rows, args.format)
+        started = time.perf_counter()
+        result = client.post('/character/import', data=body, content_type=content_type).get_json()
+        import_rate = args.rows / (time.perf_counter() - started)
+
+        started = time.perf_counter()
+        response = client.get(f'/character/export?format={args.format}', buffered=False)
+        exported = sum(len(chunk) for chunk in response.response)
+        response.close()
+        export_rate = args.rows / (time.perf_counter() - started)
+
+        # A list wrapped in an object on one line is malformed input, not one bad character
+        wrapped = client.post('/character/import', data=json.dumps({'characters': [ROW]}),
+                              content_type='application/json').get_json()
+        errors = wrapped['errors'][0]['errors'].get('row', []) if wrapped['errors'] else []
+        wrapped_rejected = wrapped['created'] == 0 and any(m.startswith('Malformed input') for m in errors)
+
+    print(f'Imported {result["created"]} of {args.rows} rows ({result["error_count"]} rejected) '
+          f'at {import_rate:,.0f} rows/s')
+    print(f'Exported {exported / 1e6:.1f} MB at {export_rate:,.0f} rows/s')
+    if not wrapped_rejected:
+        print(f'A wrapped {{"characters": [...]}} body was not rejected as malformed: {wrapped["errors"]}')
+    return 1 if import_rate < args.min_rate or result['created'] != args.rows or not wrapped_rejected else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
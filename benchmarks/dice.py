@@ -0,0 +1,52 @@
+"""Time batches of trait tests through the dice engine.
+
+Usage:
+    python benchmarks/dice.py [--sizes 1,100,1000,10000] [--iterations 1000]
+
+For each batch size, rolls that many Wild Card d8 tests --iterations times
+and prints the mean and p99 time per batch, plus the largest gap between
+the observed outcome frequencies and the exact odds table. The run fails
+if a batch of --budget-size tests takes longer than --budget-ms at p99.
+"""
+import argparse
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1,100,1000,10000', help='Comma-separated batch sizes')
+    parser.add_argument('--iterations', type=int, default=1000)
+    parser.add_argument('--budget-size', type=int, default=1000)
+    parser.add_argument('--budget-ms', type=float, default=1.0)
+    args = parser.parse_args()
+    sys.path.insert(0, PROJECT_ROOT)
+
+    import numpy as np
+    from app.character import dice
+
+    expected = dice.odds(8, 0, True)
+    status = 0
+    print(f'{"batch":>6} {"mean ms":>8} {"p99 ms":>8} {"max odds error":>15}')
+    for size in (int(size) for size in args.sizes.split(',')):
+        timings, counts = [], np.zeros(len(dice.OUTCOMES))
+        for _ in range(args.iterations):
+            started = time.perf_counter()
+            rolls = dice.roll(8, size, wild_card=True)
+            summary = dice.summarize(rolls.outcomes)
+            timings.append((time.perf_counter() - started) * 1000)
+            counts += [summary[outcome] for outcome in dice.OUTCOMES]
+        timings.sort()
+        p99 = timings[int(len(timings) * 0.99) - 1]
+        error = max(abs(counts / counts.sum() - expected))
+        print(f'{size:>6} {sum(timings) / len(timings):>8.3f} {p99:>8.3f} {error:>15.4f}')
+        if size == args.budget_size and p99 > args.budget_ms:
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""Check that campaign export memory stays flat as campaigns grow.
+
+Usage:
+    python benchmarks/export_memory.py [--sizes 1000,10000,100000] [--format ndjson]
+
+For each size a campaign with that many notes is bulk inserted into a fresh
+SQLite database, exported through GET /campaign/<id>/export and consumed
+chunk by chunk. Prints the exported size, time and peak traced memory; the
+run fails if the largest export peaks at more than --max-growth times the
+smallest.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def boot_app(database_url):
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['RATELIMIT_ENABLED'] = 'false'
+    os.environ['SCHEMA_CHECK'] = 'false'
+    os.environ['SQL_INSTRUMENTATION'] = 'false'
+    os.environ['CACHE_TYPE'] = 'NullCache'
+    sys.path.insert(0, PROJECT_ROOT)
+
+    from app import create_app, db
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def make_campaign(app, notes):
+    from datetime import datetime
+    from sqlalchemy import insert
+    from app import db
+    from app.models import Campaign, CampaignNote, User
+    from app.seed import _paragraphs, SEED_PASSWORD
+    import random
+
+    rng = random.Random(notes)
+    contents = _paragraphs(rng, 30, 300)
+    with app.app_context():
+        owner = User(username=f'export_{notes}', email=f'export_{notes}@example.com')
+        owner.set_password(SEED_PASSWORD)
+        campaign = Campaign(name=f'Export {notes}', description='Export benchmark', owner=owner, status='active')
+        campaign.members.append(owner)
+        db.session.add(campaign)
+        db.session.commit()
+        campaign_id, owner_id = campaign.id, owner.id
+        now = datetime.utcnow()
+        for start in range(0, notes, 10000):
+            db.session.execute(insert(CampaignNote), [{
+                'campaign_id': campaign_id, 'title': f'Session {number}', 'content': rng.choice(contents),
+                'note_type': 'general', 'created_at': now, 'created_by': owner_id,
+            } for number in range(start, min(notes, start + 10000))])
+        db.session.commit()
+    return campaign_id, f'export_{notes}'
+
+
+def measure(app, campaign_id, username, export_format):
+    from app.seed import SEED_PASSWORD
+
+    client = app.test_client()
+    client.post('/login', data={'username': username, 'password': SEED_PASSWORD})
+    tracemalloc.start()
+    started = time.perf_counter()
+    response = client.get(f'/campaign/{campaign_id}/export?format={export_format}', buffered=False)
+    size = 0
+    for chunk in response.response:
+        size += len(chunk)
+    response.close()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1000,10000,100000', help='Comma-separated note counts')
+    parser.add_argument('--format', default='ndjson', choices=('ndjson', 'markdown'))
+    parser.add_argument('--max-growth', type=float, default=3.0,
+                        help='Allowed ratio between the largest and smallest peak memory')
+    args = parser.parse_args()
+    sizes = [int(size) for size in args.sizes.split(',')]
+
+    peaks = []
+    with tempfile.TemporaryDirectory() as tmp:
+        app = boot_app(f'sqlite:///{tmp}/export.db')
+        print(f'{"notes":>8} {"exported MB":>12} {"seconds":>8} {"peak KB":>9}')
+        for notes in sizes:
+            campaign_id, username = make_campaign(app, notes)
+            size, elapsed, peak = measure(app, campaign_id, username, args.format)
+            peaks.append(peak)
+            print(f'{notes:>8} {size / 1e6:>12.1f} {elapsed:>8.2f} {peak / 1024:>9.0f}')
+
+    growth = peaks[-1] / peaks[0]
+    print(f'Peak memory grew {growth:.2f}x from {sizes[0]} to {sizes[-1]} notes')
+    return 1 if growth > args.max_growth else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
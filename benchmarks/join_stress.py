@@ -0,0 +1,124 @@
+"""Concurrency stress test for campaign joins.
+
+Usage:
+    python benchmarks/join_stress.py [--database URL] [--players 40] [--seats 6] [--rounds 5] [--batch 1]
+
+Each round creates a campaign with --seats seats (the owner takes one) and
+releases --players threads at once, each joining it as a different user.
+With --batch N the players are invited in groups of N instead, one bulk
+add_members call per thread. The run fails unless every round ends with exactly --seats members, a
+member_count that matches the membership rows, and exactly seats - 1
+successful joins.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def boot_app(database_url):
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['RATELIMIT_ENABLED'] = 'false'
+    os.environ['SCHEMA_CHECK'] = 'false'
+    os.environ['CACHE_TYPE'] = 'NullCache'
+    sys.path.insert(0, PROJECT_ROOT)
+
+    from app import create_app, db
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+    return app
+
+
+def run_round(app, seats, players, batch):
+    from sqlalchemy import func, select
+    from app import db
+    from app.campaign.membership import add_member, add_members
+    from app.models import Campaign, User, campaign_members
+
+    with app.app_context():
+        users = [User(username=f'stress_{os.urandom(6).hex()}', email=f'{os.urandom(6).hex()}@example.com',
+                      password='-') for _ in range(players + 1)]
+        db.session.add_all(users)
+        db.session.flush()
+        campaign = Campaign(name='Stress test', description='Concurrent joins', owner_id=users[0].id,
+                            max_players=seats, status='active')
+        campaign.members.append(users[0])
+        db.session.add(campaign)
+        db.session.commit()
+        campaign_id = campaign.id
+        player_ids = [user.id for user in users[1:]]
+        groups = [[user.username for user in users[start:start + batch]] for start in range(1, players + 1, batch)]
+
+    barrier = threading.Barrier(len(groups) if batch > 1 else players)
+    results = Counter()
+    lock = threading.Lock()
+
+    def player(user_id):
+        with app.app_context():
+            barrier.wait()
+            try:
+                result = add_member(campaign_id, user_id)
+            except Exception as e:
+                db.session.rollback()
+                result = f'error: {type(e).__name__}'
+            with lock:
+                results[result] += 1
+
+    def group(usernames):
+        with app.app_context():
+            barrier.wait()
+            try:
+                outcome = Counter(add_members(campaign_id, usernames).values())
+            except Exception as e:
+                db.session.rollback()
+                outcome = Counter({f'error: {type(e).__name__}': len(usernames)})
+            with lock:
+                results.update(outcome)
+
+    if batch > 1:
+        threads = [threading.Thread(target=group, args=(usernames,)) for usernames in groups]
+    else:
+        threads = [threading.Thread(target=player, args=(user_id,)) for user_id in player_ids]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    with app.app_context():
+        rows = db.session.execute(
+            select(func.count()).where(campaign_members.c.campaign_id == campaign_id)).scalar()
+        member_count = db.session.execute(
+            select(Campaign.member_count).where(Campaign.id == campaign_id)).scalar()
+    return results, rows, member_count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', help='Database URL (default: a temporary SQLite file)')
+    parser.add_argument('--players', type=int, default=40, help='Concurrent joiners per round')
+    parser.add_argument('--seats', type=int, default=6, help='max_players of the test campaign')
+    parser.add_argument('--rounds', type=int, default=5)
+    parser.add_argument('--batch', type=int, default=1, help='Players per bulk invite (1 joins one by one)')
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        app = boot_app(args.database or f'sqlite:///{tmp}/join_stress.db')
+        for number in range(1, args.rounds + 1):
+            results, rows, member_count = run_round(app, args.seats, args.players, args.batch)
+            ok = rows == args.seats and member_count == rows and results['joined'] == args.seats - 1
+            failures += not ok
+            print(f'round {number}: {rows} members, member_count {member_count}, '
+                  f'{dict(sorted(results.items()))} {"ok" if ok else "FAILED"}')
+
+    print(f'{args.rounds - failures}/{args.rounds} rounds held the cap')
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
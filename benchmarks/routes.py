@@ -0,0 +1,221 @@
+"""Route-level benchmarks with regression thresholds.
+
+Usage:
+    python benchmarks/routes.py                     # compare with benchmarks/baselines.json
+    python benchmarks/routes.py --update-baseline   # record a new baseline
+
+Boots create_app() against a seeded SQLite database (or --database), logs in
+as a seeded user and drives the hot routes through the Flask test client.
+For every route it records p50/p99 latency, queries per request (from the
+Server-Timing header) and peak traced memory. The run exits non-zero when a
+route does not answer 200, has no baseline, has a median latency or peak
+memory above the baseline by more than --tolerance, or issues more queries.
+
+Latency and memory depend on the machine, so record baselines on the same
+hardware that runs the comparison.
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(PROJECT_ROOT, 'benchmarks', 'baselines.json')
+
+# (name, endpoint, URL arguments from the fixture, logged in)
+ROUTES = (
+    ('campaign.index', 'campaign.index', (), True),
+    ('campaign.view', 'campaign.view', ('campaign_id',), True),
+    ('campaign.bundle', 'campaign.bundle', ('campaign_id',), True),
+    ('character.list_characters', 'character.list_characters', (), True),
+    ('character.view', 'character.view', ('character_id',), True),
+    ('inventory.get_inventory', 'inventory.get_inventory', ('character_id',), True),
+    ('main.index', 'main.index', (), True),
+    ('auth.login', 'auth.login', (), False),
+)
+
+# Absolute slack added to the relative tolerance, so sub-millisecond jitter
+# on fast routes is not reported as a regression
+NOISE_FLOOR = {'p50_ms': 1.0, 'peak_kb': 32.0}
+
+SERVER_TIMING_QUERIES = re.compile(r'db;[^,]*desc="(\d+) queries"')
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def boot_app(database_url, scale, use_cache):
+    os.environ['DATABASE_URL'] = database_url
+    os.environ['RATELIMIT_ENABLED'] = 'false'
+    os.environ['SQL_INSTRUMENTATION'] = 'true'
+    os.environ['SERVER_TIMING'] = 'true'
+    os.environ['SCHEMA_CHECK'] = 'false'
+    if use_cache:
+        # One process, so the in-process cache is as good as a shared one
+        os.environ['CACHE_SINGLE_PROCESS'] = 'true'
+    else:
+        os.environ['CACHE_TYPE'] = 'NullCache'
+    sys.path.insert(0, PROJECT_ROOT)
+
+    from app import create_app, db
+    from app.seed import DEFAULT_VOLUMES, seed_database
+
+    app = create_app()
+    app.config['WTF_CSRF_ENABLED'] = False
+    with app.app_context():
+        from sqlalchemy import inspect
+        if not inspect(db.engine).has_table('user'):
+            db.create_all()
+            volumes = {name: max(1, int(count * scale)) for name, count in DEFAULT_VOLUMES.items()}
+            seed_database(db.engine, volumes, echo=lambda message: None)
+    return app
+
+
+def find_fixture(app):
+    """Pick a seeded player whose character sits in a campaign and owns items."""
+    from sqlalchemy import select
+    from app import db
+    from app.models import User, Character, CharacterInventory
+
+    with app.app_context():
+        row = db.session.execute(
+            select(Character.id, Character.campaign_id, Character.user_id)
+            .where(Character.campaign_id.isnot(None))
+            .where(select(CharacterInventory.id)
+                   .where(CharacterInventory.character_id == Character.id).exists())
+            .order_by(Character.id)
+            .limit(1)
+        ).one()
+        username = db.session.get(User, row.user_id).username
+    return {'character_id': row.id, 'campaign_id': row.campaign_id, 'username': username}
+
+
+def measure(client, url, iterations, warmup):
+    for _ in range(warmup):
+        client.get(url)
+
+    latencies, queries, statuses = [], [], set()
+    for _ in range(iterations):
+        started = time.perf_counter()
+        response = client.get(url)
+        latencies.append((time.perf_counter() - started) * 1000)
+        statuses.add(response.status_code)
+        match = SERVER_TIMING_QUERIES.search(', '.join(response.headers.getlist('Server-Timing')))
+        queries.append(int(match.group(1)) if match else 0)
+
+    # Traced separately: tracemalloc slows every allocation down
+    tracemalloc.start()
+    client.get(url)
+    tracemalloc.stop()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    client.get(url)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'p50_ms': round(statistics.median(latencies), 3),
+        'p99_ms': round(percentile(latencies, 0.99), 3),
+        'queries': max(queries),
+        'peak_kb': round((peak - baseline) / 1024, 1),
+        'status': sorted(statuses),
+    }
+
+
+def run(app, fixture, iterations, warmup):
+    from flask import url_for
+    from app.seed import SEED_PASSWORD
+
+    anonymous = app.test_client()
+    player = app.test_client()
+    player.post('/login', data={'username': fixture['username'], 'password': SEED_PASSWORD})
+
+    # Failing routes show up in the status column; their tracebacks would drown the report
+    logging.disable(logging.CRITICAL)
+    results = {}
+    for name, endpoint, arguments, logged_in in ROUTES:
+        with app.test_request_context():
+            url = url_for(endpoint, **{argument: fixture[argument] for argument in arguments})
+        client = player if logged_in else anonymous
+        results[name] = measure(client, url, iterations, warmup)
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of regression messages."""
+    regressions = []
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            regressions.append(f'{name}: no baseline recorded; run with --update-baseline')
+            continue
+        if current['status'] != previous['status']:
+            regressions.append(f'{name}: status {previous["status"]} -> {current["status"]}')
+        if current['queries'] > previous['queries']:
+            regressions.append(f'{name}: queries {previous["queries"]} -> {current["queries"]}')
+        # p99 is the second slowest of 100 samples, one scheduler hiccup away
+        # from doubling, so it is reported but not compared
+        for metric in ('p50_ms', 'peak_kb'):
+            limit = max(previous[metric] * (1 + tolerance), previous[metric] + NOISE_FLOOR[metric])
+            if current[metric] > limit:
+                regressions.append(f'{name}: {metric} {previous[metric]} -> {current[metric]} '
+                                   f'(limit {limit:.1f})')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--database', help='Database URL to benchmark (default: a freshly seeded SQLite file)')
+    parser.add_argument('--scale', type=float, default=0.02, help='Seed volume multiplier for a fresh database')
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--warmup', type=int, default=5)
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='Allowed relative increase in latency and memory')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--update-baseline', action='store_true')
+    parser.add_argument('--cache', action='store_true', help='Benchmark with the configured page cache')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = boot_app(args.database or f'sqlite:///{tmp}/benchmark.db', args.scale, args.cache)
+        results = run(app, find_fixture(app), args.iterations, args.warmup)
+
+    print(f'{"route":<28} {"p50 ms":>9} {"p99 ms":>9} {"queries":>8} {"peak KB":>9}  status')
+    for name, result in results.items():
+        print(f'{name:<28} {result["p50_ms"]:>9.2f} {result["p99_ms"]:>9.2f} '
+              f'{result["queries"]:>8} {result["peak_kb"]:>9.1f}  {result["status"]}')
+
+    # Timings of error pages say nothing about the route, so never record or compare them
+    failing = [name for name, result in results.items() if result['status'] != [200]]
+    for name in failing:
+        print(f'FAILED {name}: status {results[name]["status"]}, expected [200]')
+    if failing:
+        return 1
+
+    if args.update_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f'Wrote baseline to {args.baseline}')
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f'No baseline at {args.baseline}; run with --update-baseline first.')
+        return 1
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    for message in regressions:
+        print(f'REGRESSION {message}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,116 @@
+"""Compare request throughput of the development server and gunicorn.
+
+Usage:
+    python benchmarks/throughput.py [--duration 10] [--concurrency 16]
+
+Each server is started against a fresh SQLite database and driven with
+concurrent keep-alive clients for the given duration. Results are printed as
+requests per second per path.
+"""
+import argparse
+import http.client
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PATHS = ('/login', '/check_username/benchmark')
+
+SERVERS = {
+    'flask-run': ['flask', 'run', '--host', '127.0.0.1', '--port', '{port}'],
+    'gunicorn': ['gunicorn', '-c', 'gunicorn.conf.py', '--bind', '127.0.0.1:{port}', 'wsgi:app'],
+}
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f'Server on port {port} did not start')
+
+
+def drive(port, path, duration, concurrency):
+    """Issue GET requests from ``concurrency`` threads; return (requests, errors)."""
+    counts = [0] * concurrency
+    errors = [0] * concurrency
+    deadline = time.time() + duration
+
+    def client(index):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        while time.time() < deadline:
+            try:
+                connection.request('GET', path)
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 400:
+                    errors[index] += 1
+                counts[index] += 1
+            except (OSError, http.client.HTTPException):
+                errors[index] += 1
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        connection.close()
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sum(counts), sum(errors)
+
+
+def run_server(name, env, duration, concurrency):
+    port = free_port()
+    command = [part.format(port=port) for part in SERVERS[name]]
+    server = subprocess.Popen(command, cwd=PROJECT_ROOT, env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_for_port(port)
+        results = {}
+        for path in PATHS:
+            drive(port, path, 1, concurrency)  # warm every worker first
+            requests, errors = drive(port, path, duration, concurrency)
+            results[path] = (requests / duration, errors)
+        return results
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--servers', nargs='+', default=list(SERVERS), choices=list(SERVERS))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ,
+                   FLASK_APP='DnDapp.py',
+                   DATABASE_URL=f'sqlite:///{tmp}/benchmark.db',
+                   RATELIMIT_ENABLED='false')
+        subprocess.run([sys.executable, '-m', 'flask', 'init-db'], cwd=PROJECT_ROOT, env=env,
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+        print(f'{"server":<12} {"path":<28} {"req/s":>10} {"errors":>8}')
+        for name in args.servers:
+            for path, (rate, errors) in run_server(name, env, args.duration, args.concurrency).items():
+                print(f'{name:<12} {path:<28} {rate:>10.1f} {errors:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""Gunicorn configuration for the D&D app.
+
+Every setting can be overridden with the GUNICORN_* environment variables
+below. Size the database pool (DB_POOL_PROFILE / DB_POOL_SIZE) to at least
+the number of threads per worker.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+
+# 'gthread' (default) or 'gevent'; gevent must be installed separately
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', '4'))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', '1000'))
+
+# Load the app once in the master and fork workers from it, so code, compiled
+# templates and configured mappers are shared copy-on-write. gevent has to
+# monkey-patch before the app is imported, so it loads the app per worker.
+preload_app = os.environ.get(
+    'GUNICORN_PRELOAD', 'false' if worker_class == 'gevent' else 'true'
+).lower() in ('1', 'true', 'yes')
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', '5'))
+
+# Recycle workers periodically to bound memory growth; jitter avoids restarting them all at once
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = os.environ.get('GUNICORN_ERROR_LOG', '-')
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    """Warm the preloaded app in the master, then freeze it for copy-on-write."""
+    if not server.cfg.preload_app:
+        return
+    from app.warmup import warm_up
+    warm_up(server.app.wsgi(), connect=False)
+    # Keep the garbage collector from touching (and so copying) the shared objects
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the master."""
+    if not server.cfg.preload_app:
+        return
+    from app.pool import dispose_engines
+    dispose_engines()
+
+
+def post_worker_init(worker):
+    """Finish warming up before the worker accepts its first request.
+
+    With a preloaded app the master has already done everything but
+    connect; otherwise this worker loaded the app itself and warms it fully.
+    """
+    from app.warmup import warm_up, warm_up_worker
+    if worker.cfg.preload_app:
+        warm_up_worker(worker.wsgi)
+    else:
+        warm_up(worker.wsgi)
@@ -5,6 +5,8 @@ from flask import current_app
 
 from alembic import context
 
+from app.models.note import NOTE_SEARCH_COLUMNS, NOTE_SEARCH_INDEXES, NOTE_SEARCH_TABLES
+
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
 config = context.config
@@ -51,6 +53,17 @@ def get_metadata():
     return target_db.metadata
 
 
+def include_name(name, type_, parent_names):
+    """Leave the note search objects created by raw DDL out of autogenerate."""
+    if type_ == 'table':
+        return name not in NOTE_SEARCH_TABLES
+    if type_ == 'column':
+        return (parent_names['table_name'], name) not in NOTE_SEARCH_COLUMNS
+    if type_ == 'index':
+        return (parent_names['table_name'], name) not in NOTE_SEARCH_INDEXES
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +78,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_name=include_name
     )
 
     with context.begin_transaction():
@@ -93,6 +107,7 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    conf_args.setdefault("include_name", include_name)
 
     connectable = get_engine()
 
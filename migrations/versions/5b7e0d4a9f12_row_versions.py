@@ -0,0 +1,117 @@
+"""Row versions and updated_at for conditional GETs
+
+Revision ID: 5b7e0d4a9f12
+Revises: c41f7e93ab25
+Create Date: 2025-01-09 18:42:10.305117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b7e0d4a9f12'
+down_revision = 'c41f7e93ab25'
+branch_labels = None
+depends_on = None
+
+VERSIONED_TABLES = ('campaign', 'campaign_note', 'map', 'character_inventory')
+
+
+def _sqlite_triggers(touch):
+    return [
+        f"""
+        CREATE TRIGGER campaign_members_claim_seat BEFORE INSERT ON campaign_members
+        BEGIN
+            SELECT RAISE(ABORT, 'campaign_full')
+            WHERE (SELECT member_count >= max_players FROM campaign WHERE id = NEW.campaign_id);
+            UPDATE campaign SET member_count = member_count + 1{touch} WHERE id = NEW.campaign_id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER campaign_members_release_seat AFTER DELETE ON campaign_members
+        BEGIN
+            UPDATE campaign SET member_count = member_count - 1{touch} WHERE id = OLD.campaign_id;
+        END
+        """,
+    ]
+
+
+def _postgresql_functions(touch):
+    return [
+        f"""
+        CREATE OR REPLACE FUNCTION campaign_members_claim_seat() RETURNS trigger AS $$
+        BEGIN
+            UPDATE campaign SET member_count = member_count + 1{touch}
+             WHERE id = NEW.campaign_id AND member_count < max_players;
+            IF NOT FOUND THEN
+                RAISE EXCEPTION 'campaign_full' USING ERRCODE = 'check_violation';
+            END IF;
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+        f"""
+        CREATE OR REPLACE FUNCTION campaign_members_release_seat() RETURNS trigger AS $$
+        BEGIN
+            UPDATE campaign SET member_count = member_count - 1{touch} WHERE id = OLD.campaign_id;
+            RETURN OLD;
+        END
+        $$ LANGUAGE plpgsql
+        """,
+    ]
+
+
+def _drop_seat_triggers():
+    op.execute('DROP TRIGGER IF EXISTS campaign_members_claim_seat')
+    op.execute('DROP TRIGGER IF EXISTS campaign_members_release_seat')
+
+
+def _replace_seat_triggers(touch):
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        _drop_seat_triggers()
+        for statement in _sqlite_triggers(touch):
+            op.execute(statement)
+    elif dialect == 'postgresql':
+        for statement in _postgresql_functions(touch):
+            op.execute(statement)
+
+
+def upgrade():
+    # Plain ADD COLUMNs, which SQLite runs in place: recreating campaign_note
+    # would drop its full-text search triggers
+    # ### commands auto generated by Alembic - please adjust! ###
+    for table in VERSIONED_TABLES:
+        with op.batch_alter_table(table, schema=None) as batch_op:
+            batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+            batch_op.add_column(sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+    # ### end Alembic commands ###
+
+    for table in ('campaign', 'campaign_note', 'map'):
+        op.execute(f'UPDATE {table} SET updated_at = created_at')
+    op.execute('UPDATE character_inventory SET updated_at = CURRENT_TIMESTAMP')
+
+    dialect = op.get_bind().dialect.name
+    touch = {'sqlite': ", updated_at = strftime('%Y-%m-%d %H:%M:%f000', 'now')",
+             'postgresql': ", updated_at = now() AT TIME ZONE 'utc'"}.get(dialect, '')
+    _replace_seat_triggers(touch)
+
+
+def downgrade():
+    # Columns are dropped in place rather than through batch mode: SQLite
+    # cannot rebuild campaign while the seat triggers refer to it, and
+    # rebuilding campaign_note would drop its full-text search triggers
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        _drop_seat_triggers()
+    else:
+        _replace_seat_triggers('')
+
+    for table in reversed(VERSIONED_TABLES):
+        op.drop_column(table, 'version')
+        op.drop_column(table, 'updated_at')
+
+    if dialect == 'sqlite':
+        _replace_seat_triggers('')
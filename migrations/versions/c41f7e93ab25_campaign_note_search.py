@@ -0,0 +1,80 @@
+"""Full-text search index on campaign notes
+
+Revision ID: c41f7e93ab25
+Revises: 8d2e5a1c6b90
+Create Date: 2024-12-09 19:55:48.204716
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41f7e93ab25'
+down_revision = '8d2e5a1c6b90'
+branch_labels = None
+depends_on = None
+
+SQLITE_UPGRADE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS campaign_note_fts USING fts5(
+        title, content, content='campaign_note', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER campaign_note_fts_insert AFTER INSERT ON campaign_note
+    BEGIN
+        INSERT INTO campaign_note_fts(rowid, title, content) VALUES (NEW.id, NEW.title, NEW.content);
+    END
+    """,
+    """
+    CREATE TRIGGER campaign_note_fts_delete AFTER DELETE ON campaign_note
+    BEGIN
+        INSERT INTO campaign_note_fts(campaign_note_fts, rowid, title, content)
+        VALUES ('delete', OLD.id, OLD.title, OLD.content);
+    END
+    """,
+    """
+    CREATE TRIGGER campaign_note_fts_update AFTER UPDATE OF title, content ON campaign_note
+    BEGIN
+        INSERT INTO campaign_note_fts(campaign_note_fts, rowid, title, content)
+        VALUES ('delete', OLD.id, OLD.title, OLD.content);
+        INSERT INTO campaign_note_fts(rowid, title, content) VALUES (NEW.id, NEW.title, NEW.content);
+    END
+    """,
+    # Index the notes that already exist
+    "INSERT INTO campaign_note_fts(campaign_note_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    'DROP TRIGGER IF EXISTS campaign_note_fts_insert',
+    'DROP TRIGGER IF EXISTS campaign_note_fts_delete',
+    'DROP TRIGGER IF EXISTS campaign_note_fts_update',
+    'DROP TABLE IF EXISTS campaign_note_fts',
+]
+
+POSTGRESQL_UPGRADE = [
+    """
+    ALTER TABLE campaign_note ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX idx_note_search ON campaign_note USING GIN (search_vector)',
+]
+
+POSTGRESQL_DOWNGRADE = [
+    'DROP INDEX IF EXISTS idx_note_search',
+    'ALTER TABLE campaign_note DROP COLUMN IF EXISTS search_vector',
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    for statement in {'sqlite': SQLITE_UPGRADE, 'postgresql': POSTGRESQL_UPGRADE}.get(dialect, []):
+        op.execute(statement)
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    for statement in {'sqlite': SQLITE_DOWNGRADE, 'postgresql': POSTGRESQL_DOWNGRADE}.get(dialect, []):
+        op.execute(statement)